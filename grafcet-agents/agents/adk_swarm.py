@@ -16,6 +16,7 @@ All agents share state through ADK's InvocationContext. Key state fields:
 
 # Load environment variables FIRST
 import os
+import sys
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -34,6 +35,14 @@ logger = logging.getLogger(__name__)
 DEFAULT_MODEL = "gemini-3-pro-preview"
 DEFAULT_THINKING_LEVEL = "low"
 
+# Agent registry names (interned: transfer_to_agent targets are looked up by these)
+AGENT_ORCHESTRATOR = sys.intern("ThinkingForge")
+AGENT_SPEC_ANALYST = sys.intern("SpecAnalyst")
+AGENT_GSRSM_ENGINEER = sys.intern("GsrsmEngineer")
+AGENT_CONDUCT_SFC = sys.intern("ConductSFCAgent")
+AGENT_MODES_SFC_PARALLEL = sys.intern("ModesSFCParallel")
+AGENT_SIMULATION = sys.intern("SimulationAgent")
+
 # ============================================================================
 # THINKING PLANNER - Enables real-time streaming of model thoughts
 # ============================================================================
@@ -54,8 +63,9 @@ from prompts import (
     SPEC_ANALYST_INSTRUCTION,
     GSRSM_ENGINEER_INSTRUCTION,
     SIMULATION_AGENT_INSTRUCTION,
-    MODE_SFC_INSTRUCTION_TEMPLATE,
-    ORCHESTRATOR_INSTRUCTION
+    ORCHESTRATOR_INSTRUCTION,
+    StaticInstruction,
+    render_mode_sfc
 )
 from sfc_programmer import ModeContext, CONDUCT_SFC_INSTRUCTION
 
@@ -86,6 +96,7 @@ from toolkit_exports import (
     get_toolkit,
     get_all_tools
 )
+from compile_save_tool import merge_mode_sfc_files
 
 
 # ============================================================================
@@ -136,8 +147,6 @@ class RegisterModeAgentsTool:
         Returns:
             Dictionary with registration status and agent count
         """
-        global modes_parallel_agent
-
         # ADK 2026: Read from ToolContext.state if parameters not provided
         if tool_context is not None:
             if io_data is None and "io_data" in tool_context.state:
@@ -150,8 +159,20 @@ class RegisterModeAgentsTool:
                 project_path = tool_context.state["project_path"]
                 logger.info("[RegisterModeAgents] Read project_path from tool_context.state")
 
+        # Register into the calling session's own ModesSFCParallel (the global one
+        # belongs to whichever swarm was built last)
+        parallel_agent = None
+        if tool_context is not None:
+            parallel_agent = _session_modes_parallel.get(tool_context.session.id)
+        if parallel_agent is None:
+            parallel_agent = modes_parallel_agent
+
+        # Mode agents run on the same model as the swarm they join
+        swarm_model = getattr(parallel_agent.parent_agent, "model", None)
+        mode_model = swarm_model if isinstance(swarm_model, str) and swarm_model else DEFAULT_MODEL
+
         # Clear existing agents
-        modes_parallel_agent.sub_agents.clear()
+        parallel_agent.sub_agents.clear()
 
         registered_agents = []
 
@@ -188,10 +209,11 @@ class RegisterModeAgentsTool:
                 mode_description=mode_description,
                 spec_context=full_context,
                 io_context=io_data,  # Pass io_data for structured access
-                project_path=project_path
+                project_path=project_path,
+                model=mode_model
             )
 
-            modes_parallel_agent.sub_agents.append(agent)
+            parallel_agent.sub_agents.append(agent)
             registered_agents.append({
                 "mode_id": mode_id,
                 "mode_name": mode_name,
@@ -239,22 +261,22 @@ _register_mode_agents_tool = RegisterModeAgentsTool()
 
 # 1. Spec Analyst Agent - with thinking planner for real-time streaming
 spec_analyst = LlmAgent(
-    name="SpecAnalyst",
+    name=AGENT_SPEC_ANALYST,
     model=DEFAULT_MODEL,
     description="Extracts IO configuration (variables and actions) from specification documents.",
     output_key="io_data",
-    instruction=SPEC_ANALYST_INSTRUCTION,
+    instruction=StaticInstruction(SPEC_ANALYST_INSTRUCTION),
     tools=[project_io_tool.extract_io_config],
     planner=thinking_planner,  # Enable thought streaming
 )
 
 # 2. GSRSM Engineer Agent - with thinking planner for real-time streaming
 gsrsm_engineer = LlmAgent(
-    name="GsrsmEngineer",
+    name=AGENT_GSRSM_ENGINEER,
     model=DEFAULT_MODEL,
     description="Designs GEMMA/GSRSM operating modes and transitions based on IEC 60848 standard.",
     output_key="gsrsm_data",
-    instruction=GSRSM_ENGINEER_INSTRUCTION,
+    instruction=StaticInstruction(GSRSM_ENGINEER_INSTRUCTION),
     tools=[update_gsrsm_tool.update_gsrsm_modes],
     planner=thinking_planner,  # Enable thought streaming
 )
@@ -324,11 +346,11 @@ IMMEDIATELY after Step 1 succeeds, call `register_mode_agents` with:
 
 # 3. Conduct SFC Agent - with thinking planner for real-time streaming
 conduct_sfc_agent = LlmAgent(
-    name="ConductSFCAgent",
+    name=AGENT_CONDUCT_SFC,
     model=DEFAULT_MODEL,
     description="Generates the master Conduct SFC and registers mode agents for parallel execution.",
     output_key="conduct_result",
-    instruction=CONDUCT_SFC_EXTENDED_INSTRUCTION,
+    instruction=StaticInstruction(CONDUCT_SFC_EXTENDED_INSTRUCTION),
     tools=[compile_save_tool.compile_and_save_sfc, _register_mode_agents_tool.register_mode_agents],
     planner=thinking_planner,  # Enable thought streaming
 )
@@ -337,11 +359,11 @@ conduct_sfc_agent = LlmAgent(
 # Has access to GetSFCContent (to fetch SFC code) and RunSimulation (to execute simulation)
 # ADK 2026: Also has get_sfc_from_state to retrieve SFC content directly from state
 simulation_agent = LlmAgent(
-    name="SimulationAgent",
+    name=AGENT_SIMULATION,
     model=DEFAULT_MODEL,
     description="Validates generated SFC files through simulation for logic correctness and safety compliance.",
     output_key="validation_result",
-    instruction=SIMULATION_AGENT_INSTRUCTION,
+    instruction=StaticInstruction(SIMULATION_AGENT_INSTRUCTION),
     tools=[
         get_sfc_content_tool.get_sfc_content,
         get_sfc_content_tool.get_sfc_from_state,  # ADK 2026: Get SFC from state
@@ -354,7 +376,7 @@ simulation_agent = LlmAgent(
 # ============================================================================
 # MODE SFC AGENT FACTORY
 # ============================================================================
-# Uses MODE_SFC_INSTRUCTION_TEMPLATE from prompts.py
+# Uses render_mode_sfc() (MODE_SFC_INSTRUCTION_TEMPLATE) from prompts.py
 # Each mode agent receives context from shared state (io_data, gsrsm_data, project_path)
 
 
@@ -364,7 +386,8 @@ def create_mode_sfc_agent(
     mode_description: str = "",
     spec_context: str = "",
     io_context: Optional[Dict[str, Any]] = None,
-    project_path: str = ""
+    project_path: str = "",
+    model: str = DEFAULT_MODEL
 ) -> LlmAgent:
     """
     Factory function to create a specialized Mode SFC agent.
@@ -381,6 +404,7 @@ def create_mode_sfc_agent(
         spec_context: Text context from spec.md or IO data
         io_context: Optional IO context with variables and actions dict
         project_path: Project folder path from state
+        model: Model the agent runs on
 
     Returns:
         LlmAgent configured for this specific mode with full state context
@@ -388,7 +412,7 @@ def create_mode_sfc_agent(
     # Use mode_description in the template, fallback to mode_name if empty
     description_text = mode_description if mode_description else f"{mode_name} mode operations"
 
-    instruction = MODE_SFC_INSTRUCTION_TEMPLATE.format(
+    instruction = render_mode_sfc(
         mode_id=mode_id,
         description=description_text
     )
@@ -417,10 +441,10 @@ def create_mode_sfc_agent(
 
     return LlmAgent(
         name=f"ModeSFC_{mode_id}",
-        model=DEFAULT_MODEL,
+        model=model,
         description=f"Generates SFC code for GSRSM mode {mode_id}: {mode_name}",
         output_key=f"mode_{mode_id.lower()}_result",
-        instruction=instruction,
+        instruction=StaticInstruction(instruction),
         tools=[compile_save_tool.compile_and_save_sfc],
         planner=thinking_planner,  # Enable thought streaming
     )
@@ -451,17 +475,19 @@ def create_modes_parallel_agent(
         mode_agents.append(agent)
 
     return ParallelAgent(
-        name="ModesSFCParallel",
+        name=AGENT_MODES_SFC_PARALLEL,
         description="Executes all mode SFC agents in parallel for concurrent code generation.",
-        sub_agents=mode_agents
+        sub_agents=mode_agents,
+        after_agent_callback=merge_mode_sfc_files,  # Commit per-mode sfc_files logs
     )
 
 
 # Default empty ModesSFCParallel agent (always exists, populated dynamically)
 modes_parallel_agent = ParallelAgent(
-    name="ModesSFCParallel",
+    name=AGENT_MODES_SFC_PARALLEL,
     description="Executes all mode SFC agents in parallel for concurrent code generation. Modes are added dynamically based on GSRSM data.",
-    sub_agents=[]
+    sub_agents=[],
+    after_agent_callback=merge_mode_sfc_files,  # Commit per-mode sfc_files logs
 )
 
 
@@ -596,10 +622,10 @@ def create_orchestrator(
         sub_agents_list.append(simulation_agent)
 
     return LlmAgent(
-        name="ThinkingForge",
+        name=AGENT_ORCHESTRATOR,
         model=DEFAULT_MODEL,
         description="Main orchestrator for GRAFCET automation. Routes tasks to specialized agents.",
-        instruction=ORCHESTRATOR_INSTRUCTION,
+        instruction=StaticInstruction(ORCHESTRATOR_INSTRUCTION),
         sub_agents=sub_agents_list,
         planner=thinking_planner,  # Enable thought streaming
     )
@@ -616,15 +642,16 @@ def _get_default_orchestrator():
     if _default_orchestrator is None:
         # Create a fresh ParallelAgent for the default orchestrator
         default_modes_parallel = ParallelAgent(
-            name="ModesSFCParallel",
+            name=AGENT_MODES_SFC_PARALLEL,
             description="Executes all mode SFC agents in parallel for concurrent code generation.",
-            sub_agents=[]
+            sub_agents=[],
+            after_agent_callback=merge_mode_sfc_files,  # Commit per-mode sfc_files logs
         )
         _default_orchestrator = LlmAgent(
-            name="ThinkingForge",
+            name=AGENT_ORCHESTRATOR,
             model=DEFAULT_MODEL,
             description="Main orchestrator for GRAFCET automation. Routes tasks to specialized agents.",
-            instruction=ORCHESTRATOR_INSTRUCTION,
+            instruction=StaticInstruction(ORCHESTRATOR_INSTRUCTION),
             sub_agents=[spec_analyst, gsrsm_engineer, conduct_sfc_agent, default_modes_parallel, simulation_agent],
             planner=thinking_planner,
         )
@@ -670,41 +697,41 @@ def create_configured_swarm(model: str = DEFAULT_MODEL, thinking_level: str = DE
 
     # Create agents with custom model and planner
     custom_spec_analyst = LlmAgent(
-        name="SpecAnalyst",
+        name=AGENT_SPEC_ANALYST,
         model=model,
         description="Extracts IO configuration (variables and actions) from specification documents.",
         output_key="io_data",
-        instruction=SPEC_ANALYST_INSTRUCTION,
+        instruction=StaticInstruction(SPEC_ANALYST_INSTRUCTION),
         tools=[project_io_tool.extract_io_config],
         planner=custom_planner,
     )
 
     custom_gsrsm_engineer = LlmAgent(
-        name="GsrsmEngineer",
+        name=AGENT_GSRSM_ENGINEER,
         model=model,
         description="Designs GEMMA/GSRSM operating modes and transitions based on IEC 60848 standard.",
         output_key="gsrsm_data",
-        instruction=GSRSM_ENGINEER_INSTRUCTION,
+        instruction=StaticInstruction(GSRSM_ENGINEER_INSTRUCTION),
         tools=[update_gsrsm_tool.update_gsrsm_modes],
         planner=custom_planner,
     )
 
     custom_conduct_sfc_agent = LlmAgent(
-        name="ConductSFCAgent",
+        name=AGENT_CONDUCT_SFC,
         model=model,
         description="Generates the master Conduct SFC and registers mode agents for parallel execution.",
         output_key="conduct_result",
-        instruction=CONDUCT_SFC_EXTENDED_INSTRUCTION,
+        instruction=StaticInstruction(CONDUCT_SFC_EXTENDED_INSTRUCTION),
         tools=[compile_save_tool.compile_and_save_sfc, _register_mode_agents_tool.register_mode_agents],
         planner=custom_planner,
     )
 
     custom_simulation_agent = LlmAgent(
-        name="SimulationAgent",
+        name=AGENT_SIMULATION,
         model=model,
         description="Validates generated SFC files through simulation for logic correctness and safety compliance.",
         output_key="validation_result",
-        instruction=SIMULATION_AGENT_INSTRUCTION,
+        instruction=StaticInstruction(SIMULATION_AGENT_INSTRUCTION),
         tools=[get_sfc_content_tool.get_sfc_content, get_sfc_content_tool.get_sfc_from_state, run_simulation_tool.run_simulation],
         planner=custom_planner,
     )
@@ -712,9 +739,10 @@ def create_configured_swarm(model: str = DEFAULT_MODEL, thinking_level: str = DE
     # Create a NEW ParallelAgent instance for this swarm (avoid parent conflict)
     # Each swarm needs its own modes_parallel_agent to avoid "already has parent" error
     custom_modes_parallel_agent = ParallelAgent(
-        name="ModesSFCParallel",
+        name=AGENT_MODES_SFC_PARALLEL,
         description="Executes all mode SFC agents in parallel for concurrent code generation.",
-        sub_agents=[]
+        sub_agents=[],
+        after_agent_callback=merge_mode_sfc_files,  # Commit per-mode sfc_files logs
     )
 
     # Update the global reference so RegisterModeAgentsTool can populate it
@@ -722,10 +750,10 @@ def create_configured_swarm(model: str = DEFAULT_MODEL, thinking_level: str = DE
     modes_parallel_agent = custom_modes_parallel_agent
 
     custom_orchestrator = LlmAgent(
-        name="ThinkingForge",
+        name=AGENT_ORCHESTRATOR,
         model=model,
         description="Main orchestrator for GRAFCET automation. Routes tasks to specialized agents.",
-        instruction=ORCHESTRATOR_INSTRUCTION,
+        instruction=StaticInstruction(ORCHESTRATOR_INSTRUCTION),
         sub_agents=[custom_spec_analyst, custom_gsrsm_engineer, custom_conduct_sfc_agent, custom_modes_parallel_agent, custom_simulation_agent],
         planner=custom_planner,
     )
@@ -743,18 +771,54 @@ def get_swarm():
     return _get_default_orchestrator()
 
 
-def get_configured_swarm(model: str = None, thinking_level: str = None) -> LlmAgent:
+# Configured swarms keyed by (session_id, model, thinking_level), oldest evicted first.
+# An ADK agent tree can't be shared between concurrent runs (ModesSFCParallel's
+# sub_agents are filled per run), so a swarm is only reused by its own session.
+_configured_swarms: Dict[tuple, LlmAgent] = {}
+_CONFIGURED_SWARM_CACHE_SIZE = 32
+
+# session_id -> that session's ModesSFCParallel, for RegisterModeAgentsTool
+_session_modes_parallel: Dict[str, ParallelAgent] = {}
+
+
+def get_configured_swarm(
+    model: str = None,
+    thinking_level: str = None,
+    session_id: Optional[str] = None
+) -> LlmAgent:
     """
     Returns a configured orchestrator with the specified model and thinking level.
 
     If no parameters provided, returns the default orchestrator.
+    With a session_id the swarm is built once per (session, model, thinking_level)
+    and reused for that session's later messages; without one a fresh swarm is built.
     """
     if model is None and thinking_level is None:
         return _get_default_orchestrator()
-    return create_configured_swarm(
-        model=model or DEFAULT_MODEL,
-        thinking_level=thinking_level or DEFAULT_THINKING_LEVEL
-    )
+
+    model = model or DEFAULT_MODEL
+    thinking_level = thinking_level or DEFAULT_THINKING_LEVEL
+    if session_id is None:
+        return create_configured_swarm(model=model, thinking_level=thinking_level)
+
+    global modes_parallel_agent
+    key = (session_id, model, thinking_level)
+    swarm = _configured_swarms.get(key)
+    if swarm is None:
+        swarm = create_configured_swarm(model=model, thinking_level=thinking_level)
+        _configured_swarms[key] = swarm
+        if len(_configured_swarms) > _CONFIGURED_SWARM_CACHE_SIZE:
+            evicted_key = next(iter(_configured_swarms))
+            evicted = _configured_swarms.pop(evicted_key)
+            evicted_parallel = next(a for a in evicted.sub_agents if a.name == AGENT_MODES_SFC_PARALLEL)
+            if _session_modes_parallel.get(evicted_key[0]) is evicted_parallel:
+                del _session_modes_parallel[evicted_key[0]]
+    else:
+        # Legacy global for callers without a ToolContext; the session's own
+        # ModesSFCParallel is (re)filled by RegisterModeAgentsTool
+        modes_parallel_agent = next(a for a in swarm.sub_agents if a.name == AGENT_MODES_SFC_PARALLEL)
+    _session_modes_parallel[session_id] = modes_parallel_agent
+    return swarm
 
 
 def get_orchestrator(modes: Optional[List[ModeContext]] = None, io_context: Optional[Dict[str, Any]] = None):
@@ -1,3 +1,15 @@
+import weakref
+
+# Tools holding a pooled aiohttp session register here, so the server can close
+# them all on shutdown (see close_tool_sessions)
+_session_owners: "weakref.WeakSet[BaseTool]" = weakref.WeakSet()
+
+
+async def close_tool_sessions():
+    """Close the pooled backend session of every tool that opened one."""
+    for tool in list(_session_owners):
+        await tool.close()
+
 
 class BaseTool:
     def __init__(self, name: str, description: str):
@@ -6,3 +18,22 @@ class BaseTool:
 
     async def execute(self, *args, **kwargs):
         raise NotImplementedError
+
+    @staticmethod
+    def _append_to_state(tool_context, key: str, *items):
+        """Append items to a list in tool_context.state as ONE tracked state write.
+
+        ADK only records state changes made through assignment, so in-place
+        list.append() calls would never reach the state delta. The list is
+        rebuilt and assigned once, however many items are added.
+        """
+        if tool_context is None or not items:
+            return
+        tool_context.state[key] = [*tool_context.state.get(key, []), *items]
+
+    def _track_session(self):
+        """Register this tool's pooled session for close_tool_sessions()."""
+        _session_owners.add(self)
+
+    async def close(self):
+        """Release pooled resources (no-op for tools without any)."""
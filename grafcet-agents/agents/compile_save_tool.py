@@ -1,8 +1,11 @@
 import aiohttp
+import hashlib
 import logging
 import os
 import json
+import re
 import aiofiles
+from collections import OrderedDict
 from typing import Optional
 from base_tool import BaseTool
 
@@ -14,14 +17,95 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Mode agents run concurrently under ModesSFCParallel. Instead of all of them
+# rewriting the shared 'sfc_files' list, each mode records its files in its own
+# log key; merge_mode_sfc_files() commits the logs once the parallel run is done.
+MODE_SFC_FILES_PREFIX = "sfc_files_mode_"
+
+
+# Line-level DSL keywords checked locally before a backend compile. Dispatch mirrors
+# the backend parser (grafcet-backend/src/services/sfc-compiler/dsl-parser.ts)
+_STEP_LINE = re.compile(r"Step\s+(\d+)", re.IGNORECASE)
+_JUMP_LINE = re.compile(r"Jump\s+(\d+)", re.IGNORECASE)
+_DIVERGENCE_CLOSERS = ("EndDivergence", "Converge")
+
+
+def precheck_sfc_code(sfc_code: str) -> Optional[str]:
+    """Cheap structural check of SFC DSL; returns an error message, or None if it looks sound.
+
+    Catches what doesn't need the real compiler - a Branch outside any Divergence, a
+    Divergence that is never closed (its content would be dropped) and Jumps to
+    undefined steps - so a broken retry fails without a backend round trip. Lines are
+    read the way the backend parser reads them; everything else is left to the compiler.
+    """
+    open_divergences = []
+    steps = set()
+    jumps = []
+    for line_no, raw in enumerate(sfc_code.splitlines(), 1):
+        line = raw.strip()
+        if line.startswith("SFC") or line.startswith("EndBranch"):
+            continue
+        if line.startswith("Divergence"):
+            open_divergences.append(line_no)
+        elif line.startswith("Branch"):
+            if not open_divergences:
+                return f"Line {line_no}: '{line}' outside a 'Divergence' block"
+        elif line.startswith(_DIVERGENCE_CLOSERS):
+            if open_divergences:  # the parser ignores a closer with nothing open
+                open_divergences.pop()
+        else:
+            match = _STEP_LINE.match(line)
+            if match:
+                steps.add(int(match.group(1)))
+                continue
+            match = _JUMP_LINE.match(line)
+            if match:
+                jumps.append((line_no, int(match.group(1))))
+    if open_divergences:
+        return f"Line {open_divergences[-1]}: 'Divergence' is never closed (missing 'EndDivergence')"
+    for line_no, target in jumps:
+        if target not in steps:
+            return f"Line {line_no}: Jump {target} references an undefined step"
+    return None
+
+
+def collect_sfc_files(state) -> list:
+    """Return state['sfc_files'] plus any per-mode entries not merged yet."""
+    sfc_files = list(state.get("sfc_files", []))
+    for key in state.to_dict():
+        if key.startswith(MODE_SFC_FILES_PREFIX):
+            sfc_files.extend(state.get(key) or [])
+    return sfc_files
+
+
+def merge_mode_sfc_files(callback_context):
+    """after_agent_callback for ModesSFCParallel: fold the per-mode logs into 'sfc_files'."""
+    state = callback_context.state
+    log_keys = [key for key in state.to_dict() if key.startswith(MODE_SFC_FILES_PREFIX)]
+    merged = []
+    for key in log_keys:
+        entries = state.get(key) or []
+        if entries:
+            merged.extend(entries)
+            state[key] = []
+    if merged:
+        state["sfc_files"] = [*state.get("sfc_files", []), *merged]
+        logger.info(f"[CompileAndSaveSFC] Merged {len(merged)} mode sfc_files into state['sfc_files']")
+    return None
+
 
 class CompileAndSaveSFCTool(BaseTool):
     """Compiles SFC DSL code and saves it as a JSON diagram file.
 
     ADK 2026 Pattern: Uses ToolContext.state for direct state management.
-    Appends to: tool_context.state['sfc_files']
+    Appends to: tool_context.state['sfc_files'] (conduct / mode_id == "")
+                tool_context.state['sfc_files_mode_<mode_id>'] (mode agents, merged later)
     """
 
+    # Compiled diagrams kept per (title, code) hash - compilation is pure, so
+    # identical DSL (e.g. retries, shared skeletons across modes) skips the backend
+    COMPILE_CACHE_SIZE = 128
+
     def __init__(
         self,
         compile_url: str = "http://localhost:3001/api/sfc/compile",
@@ -33,6 +117,12 @@ class CompileAndSaveSFCTool(BaseTool):
         )
         self.compile_url = compile_url
         self.save_url = save_url
+        self._compile_cache: "OrderedDict[str, dict]" = OrderedDict()
+
+    @staticmethod
+    def _compile_key(sfc_code: str, sfc_name: str) -> str:
+        """Content hash of a compile request (the title is part of the output)."""
+        return hashlib.blake2b(f"{sfc_name}\0{sfc_code}".encode("utf-8"), digest_size=16).hexdigest()
 
     async def compile_and_save_sfc(
         self,
@@ -66,37 +156,57 @@ class CompileAndSaveSFCTool(BaseTool):
                 - message (str): Status message
                 - error (str): Error message if failed
         """
-        # Construct path based on mode_id
+        # Construct path (and state key for the file record) based on mode_id
         if mode_id:
             target_dir = f"{project_path}/modes/{mode_id}"
+            state_key = f"{MODE_SFC_FILES_PREFIX}{mode_id}"
         else:
             target_dir = project_path
+            state_key = "sfc_files"
             
         logger.info(f"[{self.name}] Compiling SFC: {sfc_name} for Mode: {mode_id} in {target_dir}")
+
+        # Structural errors are reported without a backend round trip
+        precheck_error = precheck_sfc_code(sfc_code)
+        if precheck_error:
+            return {
+                "success": False,
+                "error": f"Compilation failed for '{sfc_name}': {precheck_error}"
+            }
         
         headers = {"x-agent-secret": "antigravity-local-agent"}
         
         async with aiohttp.ClientSession(headers=headers) as session:
             try:
-                # 1. Compile
-                compile_payload = {"code": sfc_code, "title": sfc_name}
-                
-                async with session.post(self.compile_url, json=compile_payload) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        return {
-                            "success": False, 
-                            "error": f"Compilation failed for '{sfc_name}': {error_text}"
-                        }
-                    
-                    data = await response.json()
-                    generated_sfc = data.get("generatedSFC")
-                    
-                    if not generated_sfc:
-                        return {
-                            "success": False, 
-                            "error": f"Compiler returned no SFC data for '{sfc_name}'"
-                        }
+                # 1. Compile (served from the cache when the same DSL was compiled before)
+                compile_key = self._compile_key(sfc_code, sfc_name)
+                generated_sfc = self._compile_cache.get(compile_key)
+                if generated_sfc is not None:
+                    self._compile_cache.move_to_end(compile_key)
+                    logger.info(f"[{self.name}] Compile cache hit for {sfc_name}")
+                else:
+                    compile_payload = {"code": sfc_code, "title": sfc_name}
+
+                    async with session.post(self.compile_url, json=compile_payload) as response:
+                        if response.status != 200:
+                            error_text = await response.text()
+                            return {
+                                "success": False,
+                                "error": f"Compilation failed for '{sfc_name}': {error_text}"
+                            }
+
+                        data = await response.json()
+                        generated_sfc = data.get("generatedSFC")
+
+                        if not generated_sfc:
+                            return {
+                                "success": False,
+                                "error": f"Compiler returned no SFC data for '{sfc_name}'"
+                            }
+
+                    self._compile_cache[compile_key] = generated_sfc
+                    if len(self._compile_cache) > self.COMPILE_CACHE_SIZE:
+                        self._compile_cache.popitem(last=False)
 
                 # 2. Save locally (bypass backend storage restrictions)
                 # Ensure we use .sfc extension as requested
@@ -129,12 +239,10 @@ class CompileAndSaveSFCTool(BaseTool):
                         "sfc_content": generated_sfc  # Compiled JSON diagram
                     }
 
-                    # ADK 2026: Append to ToolContext.state['sfc_files']
+                    # ADK 2026: Append to ToolContext.state['sfc_files'] (or this mode's log)
                     if tool_context is not None:
-                        if "sfc_files" not in tool_context.state:
-                            tool_context.state["sfc_files"] = []
-                        tool_context.state["sfc_files"].append(sfc_file)
-                        logger.info(f"[{self.name}] Appended sfc_file to tool_context.state['sfc_files']")
+                        self._append_to_state(tool_context, state_key, sfc_file)
+                        logger.info(f"[{self.name}] Appended sfc_file to tool_context.state['{state_key}']")
 
                     # Broadcast project_reload to trigger frontend auto-refresh
                     try:
@@ -161,10 +269,7 @@ class CompileAndSaveSFCTool(BaseTool):
                         "success": False
                     }
                     # ADK 2026: Track failures too
-                    if tool_context is not None:
-                        if "sfc_files" not in tool_context.state:
-                            tool_context.state["sfc_files"] = []
-                        tool_context.state["sfc_files"].append(sfc_file)
+                    self._append_to_state(tool_context, state_key, sfc_file)
 
                     return {
                         "success": False,
@@ -12,6 +12,7 @@ import os
 import logging
 from typing import Optional
 from base_tool import BaseTool
+from compile_save_tool import collect_sfc_files
 
 # ADK 2026: Import ToolContext for direct state management
 try:
@@ -258,7 +259,8 @@ class GetSFCContentTool(BaseTool):
                 "mode_id": mode_id
             }
 
-        sfc_files = tool_context.state.get("sfc_files", [])
+        # Includes files from mode agents whose logs haven't been merged yet
+        sfc_files = collect_sfc_files(tool_context.state)
 
         if not sfc_files:
             return {
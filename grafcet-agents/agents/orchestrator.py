@@ -12,13 +12,37 @@ if sys.platform == 'win32':
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request
+import atexit
+import logging
+import logging.handlers
+import queue
+
+# --- Logging ---
+# Records are handed to a background listener thread so the event loop never
+# blocks on stdout. Set LOG_LEVEL=DEBUG to see the per-event ADK trace.
+_log_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(levelname)s [%(name)s] %(message)s",
+    handlers=[logging.handlers.QueueHandler(_log_queue)],
+)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+logger = logging.getLogger(__name__)
+
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import json
 import asyncio
 import base64
+import hashlib
 import tempfile
+import time
+import aiofiles
+from collections import OrderedDict, defaultdict, deque
+from contextlib import aclosing, asynccontextmanager
 from pathlib import Path
 from pydantic import BaseModel
 from typing import Set, Optional, List, Dict
@@ -39,6 +63,7 @@ except Exception as e:
 
 # --- SpecGenerator for PDF to Markdown conversion ---
 from spec_generator import spec_generator, SpecResult
+from base_tool import close_tool_sessions
 
 
 # --- Spec Validation ---
@@ -76,6 +101,128 @@ def validate_spec_content(content: str) -> tuple[bool, str]:
         return False, f"❌ This document doesn't appear to be an automation specification. Please upload a document containing: process description, I/O configuration, sequence of operations, or equipment specifications."
 
 
+# --- WebSocket Frame Helpers ---
+_encode_json_str = json.encoder.encode_basestring_ascii
+
+
+def _text_frame(msg_type: str, text: str, agent: str) -> str:
+    """
+    Hand-serialize a {"type", "text", "agent"} frame without building a dict.
+
+    Produces exactly what json.dumps would for the same dict, and is used for
+    extra-less frames such as per-token "token" events.
+    """
+    return (
+        '{"type": ' + _encode_json_str(msg_type)
+        + ', "text": ' + _encode_json_str(text)
+        + ', "agent": ' + _encode_json_str(agent) + '}'
+    )
+
+
+def _stream_frame(text: str, agent: str) -> str:
+    """Hand-serialize a partial "stream" frame (the per-chunk hot path)."""
+    return (
+        '{"type": "stream", "text": ' + _encode_json_str(text)
+        + ', "agent": ' + _encode_json_str(agent) + ', "partial": true}'
+    )
+
+
+def _to_json_safe(obj):
+    """Serializer fallback for proto/map-like values such as function-call args."""
+    if hasattr(obj, "items"):
+        return dict(obj.items())
+    if hasattr(obj, "__iter__"):
+        return list(obj)
+    return str(obj)
+
+
+# orjson (Rust) is much faster than the stdlib encoder for large frames.
+# Frames stay text: the sidebar JSON.parses event.data and doesn't handle binary.
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        """Serialize a WebSocket payload to a JSON string."""
+        return orjson.dumps(obj, default=_to_json_safe).decode()
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> str:
+        """Serialize a WebSocket payload to a JSON string."""
+        return json.dumps(obj, default=_to_json_safe)
+
+    _loads = json.loads
+
+
+class StreamBatcher:
+    """
+    Coalesces per-token "stream" text into fewer WebSocket frames.
+
+    Text is buffered per agent and flushed as a single frame when the buffer
+    reaches `max_chars`, when `max_delay` seconds have passed since the first
+    buffered token (a timer flushes it even if no further token arrives), when
+    a different agent starts streaming, or when the caller flushes explicitly
+    (before any other frame type, and at the end of a run) so frame ordering on
+    the client is unchanged.
+    """
+
+    def __init__(self, send, max_chars: int = 256, max_delay: float = 0.015):
+        self._send = send  # async callable(text, agent)
+        self.max_chars = max_chars
+        self.max_delay = max_delay
+        self._agent: Optional[str] = None
+        self._parts: List[str] = []
+        self._size = 0
+        # Timer and caller flushes go through one lock, so sends never interleave
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_flush: Optional[asyncio.Task] = None
+
+    async def push(self, agent: str, text: str):
+        if self._parts and agent != self._agent:
+            await self.flush()
+        if not self._parts:
+            self._agent = agent
+            self._timer = asyncio.get_running_loop().call_later(self.max_delay, self._flush_due)
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.max_chars:
+            await self.flush()
+
+    def _flush_due(self):
+        self._timer = None
+        self._timer_flush = asyncio.ensure_future(self.flush())
+        self._timer_flush.add_done_callback(self._timer_flush_done)
+
+    @staticmethod
+    def _timer_flush_done(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Stream flush failed: {task.exception()}")
+
+    async def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        async with self._lock:
+            if not self._parts:
+                return
+            text = "".join(self._parts)
+            self._parts = []
+            self._size = 0
+            await self._send(text, self._agent)
+
+
+# Cap on tool calls/results kept per run for the end-of-run summary
+MAX_TRACKED_TOOL_EVENTS = 512
+
+# Frames with more text than this are serialized in a worker thread so a
+# large final response doesn't stall the event loop for other clients
+LARGE_FRAME_CHARS = 16384
+
+# Event attributes whose types are dumped for the first few events at DEBUG level
+_EVENT_DEBUG_ATTRS = ("author", "partial", "content", "actions", "turn_complete", "invocation_id")
+
+
 # --- Default VibIndu Agent Test Prompt ---
 DEFAULT_VIBE_PROMPT = """Build the complete automation project from this specification:
 
@@ -102,6 +249,7 @@ class UploadedFile:
     uri: str
     mime_type: str
     display_name: str
+    content_hash: Optional[str] = None  # blake2b of the raw bytes, used to reuse spec results
 
     def to_part(self):
         """Convert to a format suitable for Gemini content."""
@@ -124,6 +272,15 @@ class PDFHandler:
         "image/gif": ".gif",
     }
 
+    # Base64 characters decoded per write (multiple of 4 so each slice decodes on its own)
+    DECODE_CHUNK_CHARS = 1 << 20
+    # Raw bytes read per write for multipart uploads
+    UPLOAD_CHUNK_BYTES = 1 << 20
+
+    # Documents beyond these limits are rejected before any Gemini call
+    MAX_FILE_BYTES = 25 * 1024 * 1024
+    MAX_PDF_PAGES = 100
+
     def __init__(self):
         self.uploaded_files: List[UploadedFile] = []
         self.temp_files: List[str] = []
@@ -165,53 +322,147 @@ class PDFHandler:
             return None
 
         try:
-            # Decode base64 to bytes
-            file_bytes = base64.b64decode(base64_data)
-            file_size_kb = len(file_bytes) / 1024
-            print(f"[PDFHandler] 📄 Processing: {file_name} ({file_size_kb:.1f} KB)")
+            # Reject oversized files from the base64 length alone, before decoding anything
+            if len(base64_data) * 3 // 4 > self.MAX_FILE_BYTES:
+                raise ValueError(
+                    f"{file_name} exceeds the {self.MAX_FILE_BYTES // (1024 * 1024)} MB upload limit"
+                )
 
             # No static status message - upload silently, let model output speak
 
-            # Save to temporary file
+            # Decode base64 chunk by chunk straight into a temporary file, so the
+            # whole file is never held in memory and the event loop never blocks on write
             suffix = self.SUPPORTED_MIME_TYPES.get(mime_type, ".pdf")
-            with tempfile.NamedTemporaryFile(
-                suffix=suffix,
-                delete=False,
-                prefix="gemini_upload_"
-            ) as temp_file:
-                temp_file.write(file_bytes)
-                temp_path = temp_file.name
-                self.temp_files.append(temp_path)
-
+            fd, temp_path = tempfile.mkstemp(suffix=suffix, prefix="gemini_upload_")
+            os.close(fd)
+            self.temp_files.append(temp_path)
+
+            file_size = 0
+            hasher = hashlib.blake2b(digest_size=16)
+            step = self.DECODE_CHUNK_CHARS
+            async with aiofiles.open(temp_path, "wb") as temp_file:
+                for start in range(0, len(base64_data), step):
+                    chunk = base64.b64decode(base64_data[start:start + step])
+                    hasher.update(chunk)
+                    await temp_file.write(chunk)
+                    file_size += len(chunk)
+
+            print(f"[PDFHandler] 📄 Processing: {file_name} ({file_size / 1024:.1f} KB)")
             print(f"[PDFHandler] 💾 Saved to temp: {temp_path}")
 
-            # Upload to Gemini Files API
-            uploaded = genai_client.files.upload(file=temp_path)
-
-            result = UploadedFile(
-                name=uploaded.name,
-                uri=uploaded.uri,
-                mime_type=mime_type,
-                display_name=file_name
-            )
-
-            self.uploaded_files.append(result)
-            print(f"[PDFHandler] ✅ Uploaded to Gemini: {result.uri}")
-
-            # No static success message - let the model's output speak for itself
-            print(f"[PDFHandler] 📄 {file_name} ready for model processing")
-
-            return result
+            return await self._upload_staged_file(temp_path, file_name, mime_type, hasher.hexdigest())
 
         except Exception as e:
             print(f"[PDFHandler] ❌ Upload failed: {e}")
             if websocket:
-                await websocket.send_text(json.dumps({
+                await websocket.send_text(_dumps({
                     "type": "error",
                     "message": f"PDF upload failed: {str(e)}"
                 }))
             return None
 
+    async def process_upload(self, upload: UploadFile) -> UploadedFile:
+        """
+        Stream a multipart upload to a temporary file and upload it to Gemini Files API.
+
+        Unlike process_file_from_base64, the raw bytes are written as they arrive,
+        so there is no base64 inflation on the wire and no decode on the server.
+
+        Args:
+            upload: FastAPI UploadFile from the multipart request
+
+        Returns:
+            UploadedFile object
+
+        Raises:
+            ValueError: If the file is unsupported, empty, or over the size/page limits
+        """
+        if not genai_client:
+            raise RuntimeError("Gemini client not available")
+
+        file_name = upload.filename or "document.pdf"
+        mime_type = upload.content_type or "application/pdf"
+        if mime_type not in self.SUPPORTED_MIME_TYPES:
+            raise ValueError(f"Unsupported file type: {mime_type}")
+
+        suffix = self.SUPPORTED_MIME_TYPES[mime_type]
+        fd, temp_path = tempfile.mkstemp(suffix=suffix, prefix="gemini_upload_")
+        os.close(fd)
+
+        try:
+            file_size = 0
+            hasher = hashlib.blake2b(digest_size=16)
+            async with aiofiles.open(temp_path, "wb") as temp_file:
+                while chunk := await upload.read(self.UPLOAD_CHUNK_BYTES):
+                    file_size += len(chunk)
+                    if file_size > self.MAX_FILE_BYTES:
+                        raise ValueError(
+                            f"{file_name} exceeds the {self.MAX_FILE_BYTES // (1024 * 1024)} MB upload limit"
+                        )
+                    hasher.update(chunk)
+                    await temp_file.write(chunk)
+
+            if not file_size:
+                raise ValueError("No file data provided")
+
+            print(f"[PDFHandler] 📄 Received upload: {file_name} ({file_size / 1024:.1f} KB)")
+            return await self._upload_staged_file(temp_path, file_name, mime_type, hasher.hexdigest())
+        finally:
+            # The Gemini copy is all we need once the upload is done
+            os.unlink(temp_path)
+
+    async def _upload_staged_file(
+        self,
+        temp_path: str,
+        file_name: str,
+        mime_type: str,
+        content_hash: str
+    ) -> UploadedFile:
+        """Validate a file written to temp_path and upload it to Gemini Files API."""
+        # Cheap page-count probe so huge documents never reach Gemini
+        if mime_type == "application/pdf":
+            page_count = await asyncio.to_thread(self._count_pdf_pages, temp_path)
+            if page_count is not None and page_count > self.MAX_PDF_PAGES:
+                raise ValueError(
+                    f"{file_name} has {page_count} pages (limit is {self.MAX_PDF_PAGES})"
+                )
+
+        # Upload to Gemini Files API (blocking SDK call, kept off the event loop)
+        uploaded = await asyncio.to_thread(genai_client.files.upload, file=temp_path)
+
+        result = UploadedFile(
+            name=uploaded.name,
+            uri=uploaded.uri,
+            mime_type=mime_type,
+            display_name=file_name,
+            content_hash=content_hash
+        )
+
+        self.uploaded_files.append(result)
+        print(f"[PDFHandler] ✅ Uploaded to Gemini: {result.uri}")
+
+        # No static success message - let the model's output speak for itself
+        print(f"[PDFHandler] 📄 {file_name} ready for model processing")
+
+        return result
+
+    def claim_uploaded(self, uri: str) -> Optional[UploadedFile]:
+        """Remove and return the uploaded file with the given Gemini URI, if known."""
+        for i, uploaded in enumerate(self.uploaded_files):
+            if uploaded.uri == uri:
+                return self.uploaded_files.pop(i)
+        return None
+
+    @staticmethod
+    def _count_pdf_pages(path: str) -> Optional[int]:
+        """Return the page count of a PDF, or None if it can't be read locally."""
+        try:
+            from pypdf import PdfReader
+            return len(PdfReader(path).pages)
+        except Exception as e:
+            print(f"[PDFHandler] ⚠️ Page count probe failed ({e}) - letting Gemini handle it")
+            return None
+
     def cleanup(self):
         """Clean up temporary files and optionally delete from Gemini."""
         for temp_path in self.temp_files:
@@ -308,15 +559,134 @@ except Exception as e:
         print(f"❌ Toolkit also failed to load: {e2}")
         toolkit = {}
 
-app = FastAPI()
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    """Close the tools' pooled backend sessions when the server shuts down."""
+    yield
+    await close_tool_sessions()
+
+
+app = FastAPI(lifespan=_lifespan)
+
+# --- ADK Message Helpers ---
+# Sent to the orchestrator to resume after a transfer_to_agent (ADK issue #644 workaround)
+_CONTINUATION_TEMPLATE = "Continue with the next step. Execute {target} now."
+# Sent to a transfer target run directly: the session already holds the user's request
+_HANDOFF_TEMPLATE = "You have been handed the task. Continue with your step as {target} using the conversation so far."
+
+
+def _make_user_content(text: str):
+    """Build a single-part user Content message for the runner."""
+    return Content(role="user", parts=[Part(text=text)])
+
+
+# --- Runner Cache ---
+# One Runner per (session, model, thinking_level) - swarms are per session, see
+# get_configured_swarm; rebuilt only if the cached swarm was replaced
+_runner_cache: Dict[tuple, "Runner"] = {}
+MAX_CACHED_RUNNERS = 32
+
+
+def _cache_runner(cache: dict, key, runner, limit: int) -> None:
+    """Store a runner, evicting the oldest entry beyond limit."""
+    cache[key] = runner
+    if len(cache) > limit:
+        cache.pop(next(iter(cache)))
+
+
+def _get_runner(model: str, thinking_level: str, session_id: str):
+    """Return the (swarm, runner) pair for a session's model configuration, reusing cached instances."""
+    swarm = get_configured_swarm(model=model, thinking_level=thinking_level, session_id=session_id)
+    key = (session_id, model, thinking_level)
+    cached = _runner_cache.get(key)
+    if cached is None or cached.agent is not swarm:
+        cached = Runner(
+            agent=swarm,
+            app_name="thinking_forge",
+            session_service=session_service
+        )
+        _cache_runner(_runner_cache, key, cached, MAX_CACHED_RUNNERS)
+    return swarm, cached
+
+
+# One Runner per sub-agent invoked directly on transfer (keyed by agent identity)
+_agent_runner_cache: Dict[int, "Runner"] = {}
+MAX_CACHED_AGENT_RUNNERS = 5 * MAX_CACHED_RUNNERS  # sub-agents per swarm
+
+
+def _get_agent_runner(swarm, agent_name: str, swarm_runner):
+    """Return a Runner rooted at the named agent of the swarm, or None if it is not part of it.
+
+    Used to execute transfer_to_agent targets directly instead of routing
+    through another orchestrator LLM turn. The session is shared, so the
+    sub-agent sees the full conversation history.
+    """
+    agent = swarm.find_agent(agent_name)
+    if agent is None:
+        return None
+    if agent is swarm:
+        return swarm_runner
+    cached = _agent_runner_cache.get(id(agent))
+    if cached is None or cached.agent is not agent:
+        cached = Runner(
+            agent=agent,
+            app_name="thinking_forge",
+            session_service=session_service
+        )
+        _cache_runner(_agent_runner_cache, id(agent), cached, MAX_CACHED_AGENT_RUNNERS)
+    return cached
+
 
 # --- WebSocket Client Tracking ---
 connected_clients: Set[WebSocket] = set()
 
 # --- Conversation-to-Session Mapping ---
+class ConversationSessionMap:
+    """
+    Bounded conversationId -> ADK session_id mapping.
+
+    Entries expire after `ttl` seconds without use, and the least recently used
+    entries are dropped beyond `maxsize`. Expired session ids are handed back by
+    `pop_expired()` so the caller can delete them from the ADK session service.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 24 * 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+
+    def get(self, conversation_id: str) -> Optional[str]:
+        """Return the session id for a live conversation and refresh its TTL."""
+        entry = self._entries.get(conversation_id)
+        if entry is None or time.monotonic() - entry[1] > self.ttl:
+            return None
+        self._entries[conversation_id] = (entry[0], time.monotonic())
+        self._entries.move_to_end(conversation_id)
+        return entry[0]
+
+    def set(self, conversation_id: str, session_id: str):
+        self._entries[conversation_id] = (session_id, time.monotonic())
+        self._entries.move_to_end(conversation_id)
+
+    def pop_expired(self) -> List[str]:
+        """Remove expired and over-capacity entries, returning their session ids."""
+        expired = []
+        now = time.monotonic()
+        while self._entries:
+            conversation_id, (session_id, last_used) = next(iter(self._entries.items()))
+            if now - last_used <= self.ttl and len(self._entries) <= self.maxsize:
+                break
+            del self._entries[conversation_id]
+            expired.append(session_id)
+        return expired
+
+    def __len__(self):
+        return len(self._entries)
+
+
 # Maps frontend conversationId to ADK session_id for multi-turn conversations
 # This allows the agent to maintain context across multiple messages
-conversation_sessions: Dict[str, str] = {}
+conversation_sessions = ConversationSessionMap()
 
 class ToolRequest(BaseModel):
     tool: str
@@ -373,6 +743,29 @@ async def execute_tool(request: ToolRequest):
         print(f"[V3 ADK] Tool Execution Error: {e}")
         return {"success": False, "message": str(e)}
 
+@app.post("/files/upload")
+async def upload_file(file: UploadFile = File(...)):
+    """
+    Multipart upload for attachments, as an alternative to base64 in the WebSocket message.
+
+    The returned `uri` is sent back over /ws/vibe as `file: {"uri", "name", "type"}`.
+    """
+    try:
+        uploaded = await pdf_handler.process_upload(file)
+    except Exception as e:
+        print(f"[PDFHandler] ❌ Upload failed: {e}")
+        return {"success": False, "message": str(e)}
+    finally:
+        await file.close()
+
+    return {
+        "success": True,
+        "uri": uploaded.uri,
+        "name": uploaded.name,
+        "mime_type": uploaded.mime_type,
+        "display_name": uploaded.display_name
+    }
+
 @app.get("/")
 async def root():
     return {
@@ -399,7 +792,7 @@ async def broadcast_to_clients(payload: dict):
         print(f"[Broadcast] ⚠️ No connected clients to broadcast to")
         return 0
 
-    message = json.dumps(payload)
+    message = _dumps(payload)
     disconnected = set()
     sent = 0
 
@@ -454,7 +847,7 @@ async def websocket_vibe_endpoint(websocket: WebSocket):
     try:
         if not adk or not swarm:
             # TOOLS-ONLY mode: keep connection alive for receiving broadcasts
-            await websocket.send_text(json.dumps({
+            await websocket.send_text(_dumps({
                 "type": "status",
                 "message": "Connected in TOOLS-ONLY mode. Broadcasts will be relayed."
             }))
@@ -463,9 +856,9 @@ async def websocket_vibe_endpoint(websocket: WebSocket):
                 try:
                     data = await websocket.receive_text()
                     # In TOOLS-ONLY mode, we can still handle simple pings
-                    message = json.loads(data)
+                    message = _loads(data)
                     if message.get("type") == "ping":
-                        await websocket.send_text(json.dumps({"type": "pong"}))
+                        await websocket.send_text(_dumps({"type": "pong"}))
                 except WebSocketDisconnect:
                     break
                 except Exception:
@@ -478,51 +871,69 @@ async def websocket_vibe_endpoint(websocket: WebSocket):
             try:
                 while True:
                     data = await websocket.receive_text()
-                    message = json.loads(data)
+                    message = _loads(data)
 
                     # --- Connection State Tracking ---
                     ws_connected = True  # Track if WebSocket is still connected
 
                     # --- Enhanced Streaming Helper ---
-                    async def send_ws(msg_type: str, text: str, agent: str = None, **extra):
-                        """Send a typed WebSocket message to this client. Handles disconnects gracefully."""
+                    async def _send_frame(frame: str):
+                        """Write a serialized frame to this client. Handles disconnects gracefully."""
                         nonlocal ws_connected
-                        if not ws_connected:
-                            return  # Skip if already disconnected
-
-                        payload = {"type": msg_type, "text": text, "agent": agent or swarm.name}
-                        payload.update(extra)
                         try:
-                            await websocket.send_text(json.dumps(payload))
+                            await websocket.send_text(frame)
                         except (WebSocketDisconnect, Exception) as e:
                             ws_connected = False
                             print(f"[WS] Client disconnected during send: {type(e).__name__}")
 
+                    async def send_ws(msg_type: str, text: str, agent: str = None, /, **extra):
+                        """Send a typed WebSocket message to this client. Handles disconnects gracefully."""
+                        if not ws_connected:
+                            return  # Skip if already disconnected
+
+                        if extra:
+                            payload = {"type": msg_type, "text": text, "agent": agent or swarm.name}
+                            payload.update(extra)
+                            frame = _dumps(payload)
+                        else:
+                            # Fast path for fixed-shape frames (e.g. "token")
+                            frame = _text_frame(msg_type, text, agent or swarm.name)
+                        await _send_frame(frame)
+
+                    async def send_ws_stream(agent: str, text: str):
+                        """Send a partial "stream" chunk - no kwargs, no payload dict."""
+                        if ws_connected:
+                            await _send_frame(_stream_frame(text, agent or swarm.name))
+
+                    # Event type -> sender, built once per message instead of an if/elif chain per token
+                    callback_dispatch = {
+                        "thinking": lambda tok, meta, agent: send_ws("thinking", tok, agent),
+                        "task": lambda tok, meta, agent: send_ws("task", tok, agent, task=meta.get("task", "")),
+                        "tool_call": lambda tok, meta, agent: send_ws(
+                            "tool_call", tok, agent,
+                            tool_name=meta.get("tool_name", ""),
+                            tool_params=meta.get("tool_params", {})),
+                        "tool_result": lambda tok, meta, agent: send_ws(
+                            "tool_result", tok, agent,
+                            tool_name=meta.get("tool_name", ""),
+                            tool_result=meta.get("tool_result", {})),
+                        "status": lambda tok, meta, agent: send_ws("status", tok, agent),
+                    }
+
                     # ADK Streaming Callback — captures ALL agent activity
                     async def adk_callback(token: str, metadata: dict = None):
                         meta = metadata or {}
                         agent_name = meta.get("agent", swarm.name)
-                        event_type = meta.get("type", "token")
-
-                        if event_type == "thinking":
-                            await send_ws("thinking", token, agent_name)
-                        elif event_type == "task":
-                            await send_ws("task", token, agent_name, task=meta.get("task", ""))
-                        elif event_type == "tool_call":
-                            await send_ws("tool_call", token, agent_name,
-                                          tool_name=meta.get("tool_name", ""),
-                                          tool_params=meta.get("tool_params", {}))
-                        elif event_type == "tool_result":
-                            await send_ws("tool_result", token, agent_name,
-                                          tool_name=meta.get("tool_name", ""),
-                                          tool_result=meta.get("tool_result", {}))
-                        elif event_type == "status":
-                            await send_ws("status", token, agent_name)
+                        handler = callback_dispatch.get(meta.get("type", "token"))
+                        if handler:
+                            await handler(token, meta, agent_name)
                         else:
                             # Default: stream token
                             await send_ws("token", token, agent_name)
 
                     user_text = message.get("text", "")
+                    # project_path: Required by all tools and agents (resolved once per message)
+                    project_path = message.get("project_path") or message.get("projectPath") or ""
 
                     # --- Dynamic Model Configuration ---
                     # Extract model and thinking_level from frontend for Gemini 3 support
@@ -534,9 +945,19 @@ async def websocket_vibe_endpoint(websocket: WebSocket):
                     # --- PDF File Handling ---
                     # Check if a file is attached and process it
                     uploaded_file = None
-                    file_data = message.get("file")
+                    # Pop the attachment so the (large) base64 payload isn't copied into session state
+                    file_data = message.pop("file", None)
 
-                    if file_data and file_data.get("data"):
+                    if file_data and file_data.get("uri"):
+                        # File was already uploaded through POST /files/upload
+                        file_name = file_data.get("name", "document")
+                        uploaded_file = pdf_handler.claim_uploaded(file_data["uri"])
+                        if uploaded_file:
+                            print(f"[V3 ADK] 📎 Using uploaded file: {file_name} ({uploaded_file.uri})")
+                        else:
+                            await send_ws("error", f"Unknown or expired upload: {file_name}", "PDFHandler")
+                    elif file_data and file_data.get("data"):
+                        # Legacy clients: base64 file data inline in the message
                         file_type = file_data.get("type", "")
                         file_name = file_data.get("name", "document")
 
@@ -562,20 +983,18 @@ async def websocket_vibe_endpoint(websocket: WebSocket):
                     spec_content = None
                     spec_is_valid = False
                     if uploaded_file and uploaded_file.mime_type == "application/pdf":
-                        # Get project path from context if available
-                        project_path = message.get("project_path") or message.get("projectPath")
-
                         # Real-time streaming callback for spec generation
                         async def spec_stream_callback(text_chunk: str):
                             """Stream spec generation chunks to the UI in real-time."""
-                            await send_ws("stream", text_chunk, "SpecGenerator", partial=True)
+                            await send_ws_stream("SpecGenerator", text_chunk)
 
                         # Generate spec.md with REAL streaming
                         spec_result = await spec_generator.generate_spec_from_pdf(
                             file_uri=uploaded_file.uri,
                             mime_type=uploaded_file.mime_type,
                             project_path=project_path,
-                            stream_callback=spec_stream_callback  # Enable real-time streaming!
+                            stream_callback=spec_stream_callback,  # Enable real-time streaming!
+                            content_hash=uploaded_file.content_hash  # Reuse results for repeated uploads
                         )
 
                         if spec_result.success:
@@ -615,8 +1034,6 @@ async def websocket_vibe_endpoint(websocket: WebSocket):
                     enhanced_context = message.copy()
 
                     # Initialize state keys that agents will use
-                    # project_path: Required by all tools and agents
-                    project_path = message.get("project_path") or message.get("projectPath") or ""
                     enhanced_context["project_path"] = project_path
 
                     # sfc_files: Will be populated by SFC agents (empty list to start)
@@ -678,10 +1095,22 @@ async def websocket_vibe_endpoint(websocket: WebSocket):
                         import uuid
                         conversation_id = message.get("conversationId")
 
+                        # Free ADK state held by conversations that have expired
+                        for stale_session_id in conversation_sessions.pop_expired():
+                            try:
+                                await session_service.delete_session(
+                                    app_name="thinking_forge",
+                                    user_id="vibe_user",
+                                    session_id=stale_session_id
+                                )
+                                print(f"[V3 ADK] 🗑️ Evicted expired session {stale_session_id}")
+                            except Exception as e:
+                                print(f"[V3 ADK] ⚠️ Could not evict session {stale_session_id}: {e}")
+
                         session = None
-                        if conversation_id and conversation_id in conversation_sessions:
+                        existing_session_id = conversation_sessions.get(conversation_id) if conversation_id else None
+                        if existing_session_id:
                             # Reuse existing session for this conversation
-                            existing_session_id = conversation_sessions[conversation_id]
                             try:
                                 session = await session_service.get_session(
                                     app_name="thinking_forge",
@@ -702,41 +1131,41 @@ async def websocket_vibe_endpoint(websocket: WebSocket):
                             )
                             # Store mapping for future messages in this conversation
                             if conversation_id:
-                                conversation_sessions[conversation_id] = session.id
+                                conversation_sessions.set(conversation_id, session.id)
                                 print(f"[V3 ADK] 🆕 Created session {session.id} for conversation {conversation_id}")
                             else:
                                 print(f"[V3 ADK] 🆕 Created one-shot session {session.id} (no conversationId)")
 
                         # Create content for the runner
-                        user_content = Content(
-                            role="user",
-                            parts=[Part(text=enhanced_user_text)]
-                        )
+                        user_content = _make_user_content(enhanced_user_text)
 
-                        # --- Create Dynamic Runner with Model/Thinking Level from Frontend ---
-                        # This allows real-time configuration of Gemini 3 models
-                        dynamic_swarm = get_configured_swarm(
-                            model=selected_model,
-                            thinking_level=thinking_level
-                        )
-                        dynamic_runner = Runner(
-                            agent=dynamic_swarm,
-                            app_name="thinking_forge",
-                            session_service=session_service
-                        )
+                        # --- Dynamic Runner with Model/Thinking Level from Frontend ---
+                        # This allows real-time configuration of Gemini 3 models;
+                        # swarm and runner are cached per session and configuration
+                        dynamic_swarm, dynamic_runner = _get_runner(selected_model, thinking_level, session.id)
 
                         # Run ADK with streaming - REAL MODEL OUTPUT STREAMING (token by token)
-                        full_response = ""
-                        agent_responses = {}  # Track responses per agent for individual saves
+                        # Text chunks are collected in lists and joined once, keeping accumulation linear
+                        full_response_parts: List[str] = []
+                        full_response_len = 0
+                        agent_responses: Dict[str, List[str]] = defaultdict(list)  # Per-agent chunks for individual saves
                         current_agent = dynamic_swarm.name
                         last_streamed_agent = None  # Track agent for streaming continuity
                         event_count = 0  # Debug counter
-                        tool_calls_made = []  # Track tool calls for summary if no text response
-                        tool_results = []  # Track tool results
+                        # Track recent tool calls/results for the summary if there is no text response
+                        # (bounded: the UI already received every entry via send_ws)
+                        tool_calls_made = deque(maxlen=MAX_TRACKED_TOOL_EVENTS)
+                        tool_results = deque(maxlen=MAX_TRACKED_TOOL_EVENTS)
                         pending_transfers = []  # Track transfer_to_agent actions for manual execution
                         max_transfer_iterations = 10  # Prevent infinite loops
                         transfer_iteration = 0
                         current_message = user_content  # Message to send (changes on transfers)
+                        active_runner = dynamic_runner  # Runner for this iteration (sub-agent runner on transfers)
+
+                        # Coalesces per-token "stream" frames; flushed before any other frame type
+                        stream_batcher = StreamBatcher(
+                            lambda text, agent: send_ws_stream(agent, text)
+                        )
 
                         print(f"[V3 ADK] 🚀 Starting ADK run_async with model={selected_model}")
 
@@ -748,147 +1177,197 @@ async def websocket_vibe_endpoint(websocket: WebSocket):
                             if transfer_iteration > 1:
                                 print(f"[V3 ADK] 🔄 Transfer iteration #{transfer_iteration}")
 
-                            async for event in dynamic_runner.run_async(
+                            # aclosing() guarantees the generator is closed (cancelling the
+                            # model stream) when we stop early because the client disconnected
+                            async with aclosing(active_runner.run_async(
                                 user_id="vibe_user",
                                 session_id=session.id,
                                 new_message=current_message
-                            ):
-                                event_count += 1
-                                # Debug: Print raw event info with more details
-                                has_content = hasattr(event, 'content') and event.content is not None
-                                has_actions = hasattr(event, 'actions') and event.actions is not None
-                                is_final = getattr(event, 'is_final', None)
-                                print(f"[V3 ADK] Event #{event_count}: author={getattr(event, 'author', 'N/A')}, partial={getattr(event, 'partial', 'N/A')}, has_content={has_content}, has_actions={has_actions}, is_final={is_final}")
-
-                                # Debug: Print all event attributes to understand the structure
-                                if event_count <= 5:  # Only for first 5 events to avoid spam
-                                    try:
-                                        event_attrs = {k: str(v)[:100] for k, v in vars(event).items() if not k.startswith('_')}
-                                        print(f"[V3 ADK] Event #{event_count} attrs: {event_attrs}")
-                                    except Exception as e:
-                                        print(f"[V3 ADK] Event #{event_count} attrs error: {e}")
-
-                                # Get the agent name from the event
-                                agent_name = getattr(event, 'author', None) or dynamic_swarm.name
-
-                                # Detect agent handoffs - stream when a new agent takes over
-                                if agent_name != current_agent and agent_name != 'user':
-                                    # SAVE previous agent's response before switching
-                                    if current_agent and current_agent in agent_responses and agent_responses[current_agent]:
-                                        prev_response = agent_responses[current_agent]
-                                        print(f"[Stream] 💾 Saving {current_agent}'s response ({len(prev_response)} chars) before handoff")
-                                        await send_ws("agent_response", prev_response, current_agent)
-
-                                    current_agent = agent_name
-                                    # No static handoff message - agent's output will identify itself
-                                    print(f"[Stream] Agent handoff: {agent_name}")
-
-                                # Check for transfer_to_agent action (agent delegation)
-                                # Track transfers for manual execution after run completes
-                                # This is a workaround for ADK issue #644 where transfer_to_agent
-                                # doesn't actually transfer control in streaming mode
-                                if hasattr(event, 'actions') and event.actions:
-                                    transfer_target = getattr(event.actions, 'transfer_to_agent', None)
+                            )) as adk_events:
+                                async for event in adk_events:
+                                    if not ws_connected:
+                                        logger.info("[V3 ADK] 🛑 Client disconnected - cancelling ADK run")
+                                        break
+
+                                    event_count += 1
+                                    # Read each event attribute once and reuse the locals below
+                                    content = getattr(event, 'content', None)
+                                    parts = getattr(content, 'parts', None) if content else None
+                                    actions = getattr(event, 'actions', None)
+                                    author = getattr(event, 'author', None)
+                                    is_partial = getattr(event, 'partial', False)
+
+                                    debug_enabled = logger.isEnabledFor(logging.DEBUG)
+                                    if debug_enabled:
+                                        # Debug: raw event info with more details
+                                        is_final = getattr(event, 'is_final', None)
+                                        logger.debug(f"[V3 ADK] Event #{event_count}: author={author}, partial={is_partial}, has_content={content is not None}, has_actions={actions is not None}, is_final={is_final}")
+
+                                        # Debug: all event attributes to understand the structure
+                                        # (type names only - str() on nested protos walks the whole tree)
+                                        if event_count <= 5:  # Only for first 5 events to avoid spam
+                                            event_attrs = {k: type(getattr(event, k, None)).__name__ for k in _EVENT_DEBUG_ATTRS}
+                                            logger.debug(f"[V3 ADK] Event #{event_count} attrs: {event_attrs}")
+
+                                    # Get the agent name from the event
+                                    agent_name = author or dynamic_swarm.name
+
+                                    # Detect agent handoffs - stream when a new agent takes over
+                                    if agent_name != current_agent and agent_name != 'user':
+                                        await stream_batcher.flush()
+                                        # SAVE previous agent's response before switching
+                                        # (popped: once saved, the chunks are no longer needed)
+                                        prev_chunks = agent_responses.pop(current_agent, None) if current_agent else None
+                                        if ws_connected and prev_chunks:
+                                            # The client already holds the streamed text, so only a
+                                            # compact commit marker is sent instead of the full response
+                                            prev_length = sum(map(len, prev_chunks))
+                                            logger.info(f"[Stream] 💾 Committing {current_agent}'s response ({prev_length} chars) before handoff")
+                                            await send_ws("agent_response_commit", "", current_agent, length=prev_length)
+
+                                        current_agent = agent_name
+                                        # No static handoff message - agent's output will identify itself
+                                        logger.info(f"[Stream] Agent handoff: {agent_name}")
+
+                                    # Check for transfer_to_agent action (agent delegation)
+                                    # Track transfers for manual execution after run completes
+                                    # This is a workaround for ADK issue #644 where transfer_to_agent
+                                    # doesn't actually transfer control in streaming mode
+                                    # (EventActions always defines transfer_to_agent - plain attribute access)
+                                    transfer_target = actions.transfer_to_agent if actions is not None else None
                                     if transfer_target:
-                                        print(f"[Stream] 🎯 Transfer requested to: {transfer_target}")
-                                        pending_transfers.append({
-                                            'target': transfer_target,
-                                            'context': enhanced_context
-                                        })
-
-                                # Process content parts - THIS IS THE REAL MODEL OUTPUT
-                                if hasattr(event, 'content') and event.content and hasattr(event.content, 'parts'):
-                                    parts_count = len(event.content.parts) if hasattr(event.content.parts, '__len__') else 'unknown'
-                                    print(f"[DEBUG EVENT] agent={agent_name}, has_content=True, parts_count={parts_count}")
-
-                                    for part_idx, part in enumerate(event.content.parts):
-                                        # Check if this is a partial (streaming) chunk
-                                        # ADK sets partial=True for streaming chunks
-                                        is_partial = getattr(event, 'partial', False)
-
-                                        # Check if this is a THOUGHT part (from BuiltInPlanner with include_thoughts=True)
-                                        # When thought=True, the text content IS the model's thinking
-                                        # The thought attribute is a boolean - True for thoughts, False or None otherwise
-                                        thought_attr = getattr(part, 'thought', None)
-                                        is_thought_part = thought_attr is True  # Explicit True check
-
-                                        # Also check for text content
-                                        text_content = getattr(part, 'text', None)
-                                        has_function_call = hasattr(part, 'function_call') and part.function_call
-                                        has_function_response = hasattr(part, 'function_response') and part.function_response
-
-                                        print(f"[DEBUG PART {part_idx}] agent={agent_name}, thought={thought_attr}, is_thought={is_thought_part}, partial={is_partial}, has_text={text_content is not None}, text_len={len(text_content) if text_content else 0}, has_fc={has_function_call}, has_fr={has_function_response}")
-
-                                        # Stream TEXT - the actual model-generated content
-                                        if hasattr(part, 'text') and part.text:
-                                            text = part.text
-
-                                            # If this is a thought part, stream as "thinking"
-                                            if is_thought_part:
-                                                await send_ws("thinking", text, agent_name, partial=is_partial)
-                                                print(f"[{agent_name}] 🧠 THOUGHT SENT: {text[:100]}..." if len(text) > 100 else f"[{agent_name}] 🧠 THOUGHT SENT: {text}")
-                                            else:
-                                                # Regular text - add to full response AND per-agent response
-                                                full_response += text
+                                        logger.info(f"[Stream] 🎯 Transfer requested to: {transfer_target}")
+                                        pending_transfers.append({'target': transfer_target})
+
+                                    # Process content parts - THIS IS THE REAL MODEL OUTPUT
+                                    if parts:
+                                        if debug_enabled:
+                                            parts_count = len(parts) if hasattr(parts, '__len__') else 'unknown'
+                                            logger.debug(f"[DEBUG EVENT] agent={agent_name}, has_content=True, parts_count={parts_count}")
+
+                                        for part_idx, part in enumerate(parts):
+                                            # is_partial: ADK sets partial=True for streaming chunks (read once per event)
+
+                                            # Check if this is a THOUGHT part (from BuiltInPlanner with include_thoughts=True)
+                                            # When thought=True, the text content IS the model's thinking
+                                            # The thought attribute is a boolean - True for thoughts, False or None otherwise
+                                            thought_attr = getattr(part, 'thought', None)
+                                            is_thought_part = thought_attr is True  # Explicit True check
+
+                                            text = getattr(part, 'text', None)
+
+                                            # FAST PATH: partial streaming chunk of plain text (the vast majority of parts)
+                                            # Skips the thought / tool branches and the debug formatting entirely
+                                            if is_partial and text and not is_thought_part:
+                                                full_response_parts.append(text)
+                                                full_response_len += len(text)
                                                 last_streamed_agent = agent_name
+                                                agent_responses[agent_name].append(text)
+                                                if ws_connected:
+                                                    await stream_batcher.push(agent_name, text)
+                                                continue
+
+                                            # SLOW PATH: thoughts, tool calls/results and final non-partial text
+                                            # Read function call / function response once per part
+                                            fc = getattr(part, 'function_call', None)
+                                            fr = getattr(part, 'function_response', None)
+
+                                            if debug_enabled:
+                                                logger.debug(f"[DEBUG PART {part_idx}] agent={agent_name}, thought={thought_attr}, is_thought={is_thought_part}, partial={is_partial}, has_text={text is not None}, text_len={len(text) if text else 0}, has_fc={bool(fc)}, has_fr={bool(fr)}")
+
+                                            # Stream TEXT - the actual model-generated content
+                                            if text:
+                                                # If this is a thought part, stream as "thinking"
+                                                if is_thought_part:
+                                                    if ws_connected:
+                                                        await stream_batcher.flush()
+                                                        await send_ws("thinking", text, agent_name, partial=is_partial)
+                                                    if debug_enabled:
+                                                        logger.debug(f"[{agent_name}] 🧠 THOUGHT SENT: {text[:100]}..." if len(text) > 100 else f"[{agent_name}] 🧠 THOUGHT SENT: {text}")
+                                                else:
+                                                    # Regular text - add to full response AND per-agent response
+                                                    full_response_parts.append(text)
+                                                    full_response_len += len(text)
+                                                    last_streamed_agent = agent_name
+
+                                                    # Track per-agent response for individual saves on handoff
+                                                    agent_responses[agent_name].append(text)
+
+                                                    # Stream for real-time display (coalesced into small batches)
+                                                    # Sent as 'stream' type which VibeSidebar appends to current message
+                                                    # Once the client is gone, keep accumulating for persistence but skip the wire
+                                                    if ws_connected:
+                                                        await stream_batcher.push(agent_name, text)
+
+                                                    # Also log to console for debugging
+                                                    if debug_enabled:
+                                                        logger.debug(f"[{agent_name}] {text[:100]}..." if len(text) > 100 else f"[{agent_name}] {text}")
+
+                                            # Handle FUNCTION CALLS (tool requests)
+                                            # Stream REAL tool call data to UI - no static messages
+                                            if fc:
+                                                tool_name = fc.name
+                                                # Tool parameters are passed by reference (serialized once in send_ws)
+                                                tool_params = getattr(fc, 'args', None) or {}
+                                                tool_calls_made.append({"agent": agent_name, "tool": tool_name, "params": tool_params})
+                                                logger.info(f"[{agent_name}] Tool call: {tool_name}")
+                                                if debug_enabled:
+                                                    logger.debug(f"[{agent_name}] Tool call params: {tool_params}")
+                                                # Stream REAL tool call with actual parameters to UI
+                                                if ws_connected:
+                                                    await stream_batcher.flush()
+                                                    await send_ws("tool_call", "", agent_name, tool_name=tool_name, tool_params=tool_params)
+
+                                            # Handle FUNCTION RESPONSES (tool results)
+                                            # Stream REAL tool results to UI - no static messages
+                                            if fr:
+                                                # Extract the FULL response data - this is the real output
+                                                response_data = getattr(fr, 'response', {}) or {}
+                                                if isinstance(response_data, dict):
+                                                    success = response_data.get('success', True)
+                                                    tool_results.append({
+                                                        "tool": fr.name,
+                                                        "success": success,
+                                                        "result": response_data,  # Full result data
+                                                        "agent": agent_name
+                                                    })
+                                                    # Stream REAL tool result with actual data to UI
+                                                    if ws_connected:
+                                                        await stream_batcher.flush()
+                                                        await send_ws("tool_result", "", agent_name, tool_name=fr.name, tool_result=response_data, success=success)
+                                                logger.info(f"[{agent_name}] Tool result: {fr.name}")
+                                                if debug_enabled:
+                                                    logger.debug(f"[{agent_name}] Tool result data: {fr.name} -> {response_data}")
+
+                            # Nobody is listening any more - don't start further transfer iterations
+                            if not ws_connected:
+                                break
 
-                                                # Track per-agent response for individual saves on handoff
-                                                if agent_name not in agent_responses:
-                                                    agent_responses[agent_name] = ""
-                                                agent_responses[agent_name] += text
-
-                                                # ALWAYS stream token by token for real-time display
-                                                # Send as 'stream' type which VibeSidebar appends to current message
-                                                await send_ws("stream", text, agent_name, partial=True)
-
-                                                # Also print to console for debugging
-                                                print(f"[{agent_name}] {text[:100]}..." if len(text) > 100 else f"[{agent_name}] {text}")
-
-                                        # Handle FUNCTION CALLS (tool requests)
-                                        # Stream REAL tool call data to UI - no static messages
-                                        if hasattr(part, 'function_call') and part.function_call:
-                                            fc = part.function_call
-                                            tool_name = fc.name
-                                            # Extract actual tool parameters
-                                            tool_params = dict(fc.args) if hasattr(fc, 'args') and fc.args else {}
-                                            tool_calls_made.append({"agent": agent_name, "tool": tool_name, "params": tool_params})
-                                            print(f"[{agent_name}] Tool call: {tool_name} with params: {tool_params}")
-                                            # Stream REAL tool call with actual parameters to UI
-                                            await send_ws("tool_call", "", agent_name, tool_name=tool_name, tool_params=tool_params)
-
-                                        # Handle FUNCTION RESPONSES (tool results)
-                                        # Stream REAL tool results to UI - no static messages
-                                        if hasattr(part, 'function_response') and part.function_response:
-                                            fr = part.function_response
-                                            # Extract the FULL response data - this is the real output
-                                            response_data = getattr(fr, 'response', {}) or {}
-                                            if isinstance(response_data, dict):
-                                                success = response_data.get('success', True)
-                                                tool_results.append({
-                                                    "tool": fr.name,
-                                                    "success": success,
-                                                    "result": response_data,  # Full result data
-                                                    "agent": agent_name
-                                                })
-                                                # Stream REAL tool result with actual data to UI
-                                                await send_ws("tool_result", "", agent_name, tool_name=fr.name, tool_result=response_data, success=success)
-                                            print(f"[{agent_name}] Tool result: {fr.name} -> {response_data}")
+                            # Push out any text still buffered from this run
+                            await stream_batcher.flush()
 
                             # End of async for event loop - check for pending transfers
                             if pending_transfers:
                                 # Get the first pending transfer target
                                 next_transfer = pending_transfers[0]
-                                target_agent = next_transfer['target']
+                                target_agent = sys.intern(next_transfer['target'])
                                 print(f"[V3 ADK] 🔄 Processing pending transfer to: {target_agent}")
 
-                                # Create a continuation message that tells the orchestrator to continue with the target agent
-                                # This uses ADK's session memory - the orchestrator should pick up where it left off
-                                continuation_text = f"Continue with the next step. Execute {target_agent} now."
-                                current_message = Content(
-                                    role="user",
-                                    parts=[Part(text=continuation_text)]
-                                )
-                                print(f"[V3 ADK] 📨 Sending continuation: {continuation_text}")
+                                # Run the target agent directly - the shared session already holds the
+                                # user's message (and any attached file), so it only gets a short handoff
+                                # turn and no routing LLM turn is needed
+                                target_runner = _get_agent_runner(dynamic_swarm, target_agent, dynamic_runner)
+                                if target_runner is not None:
+                                    active_runner = target_runner
+                                    current_message = _make_user_content(_HANDOFF_TEMPLATE.format(target=target_agent))
+                                    print(f"[V3 ADK] ⏩ Invoking {target_agent} directly")
+                                else:
+                                    # Unknown target - fall back to asking the orchestrator to continue
+                                    # This uses ADK's session memory - the orchestrator should pick up where it left off
+                                    active_runner = dynamic_runner
+                                    continuation_text = _CONTINUATION_TEMPLATE.format(target=target_agent)
+                                    current_message = _make_user_content(continuation_text)
+                                    print(f"[V3 ADK] 📨 Sending continuation: {continuation_text}")
                             else:
                                 # No more transfers - exit the while loop
                                 print(f"[V3 ADK] ✅ No pending transfers, execution complete")
@@ -900,7 +1379,8 @@ async def websocket_vibe_endpoint(websocket: WebSocket):
 
                         # Send agent_response with full accumulated text for persistence
                         # This ensures the complete response is saved to conversation history
-                        print(f"[V3 ADK] ✅ ADK run completed. Total events: {event_count}, Response length: {len(full_response)}, Iterations: {transfer_iteration}")
+                        full_response = "".join(full_response_parts)
+                        print(f"[V3 ADK] ✅ ADK run completed. Total events: {event_count}, Response length: {full_response_len}, Iterations: {transfer_iteration}")
 
                         # NOTE: Removed fallback summary generation
                         # Agents should provide their own text responses via their prompts
@@ -915,11 +1395,16 @@ async def websocket_vibe_endpoint(websocket: WebSocket):
                         # Only send if client is still connected
                         if ws_connected:
                             try:
-                                await websocket.send_text(json.dumps({
+                                final_payload = {
                                     "type": "agent_response",
                                     "text": full_response if full_response else "",
                                     "agent": final_agent
-                                }))
+                                }
+                                if full_response_len > LARGE_FRAME_CHARS:
+                                    final_frame = await asyncio.to_thread(_dumps, final_payload)
+                                else:
+                                    final_frame = _dumps(final_payload)
+                                await websocket.send_text(final_frame)
                             except (WebSocketDisconnect, Exception) as send_err:
                                 print(f"[V3 ADK] Could not send final response (client disconnected): {type(send_err).__name__}")
                         else:
@@ -932,7 +1417,7 @@ async def websocket_vibe_endpoint(websocket: WebSocket):
                         # Only try to send error if client is still connected
                         if ws_connected:
                             try:
-                                await websocket.send_text(json.dumps({
+                                await websocket.send_text(_dumps({
                                     "type": "error",
                                     "message": f"ADK Runtime Error: {str(e)}"
                                 }))
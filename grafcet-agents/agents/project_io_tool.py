@@ -1,4 +1,6 @@
 import json
+import time
+import asyncio
 import logging
 import aiohttp
 from typing import Optional
@@ -20,12 +22,82 @@ class ProjectIOTool(BaseTool):
     Writes to: tool_context.state['io_data']
     """
 
-    def __init__(self, api_url: str = "http://localhost:3001/api/simulation/save"):
+    def __init__(self, api_url: str = "http://localhost:3001/api/simulation/save", await_backend: bool = False):
         super().__init__(
             name="ProjectIOTool",
             description="Validates and applies Actions and Transition Variables to the current project.",
         )
         self.api_url = api_url
+        # When False, the backend save runs in the background and the tool returns
+        # as soon as the state is written (savedPath is then None)
+        self.await_backend = await_backend
+        self._pending_saves: set[asyncio.Task] = set()
+        self._headers = {"x-agent-secret": "antigravity-local-agent"}
+        self._timeout = aiohttp.ClientTimeout(total=3)  # Short timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Circuit breaker: skip backend saves for a while after a connection failure
+        self._backend_healthy = True
+        self._last_failure_ts = 0.0
+        self._cooldown = 30.0
+
+    def _backend_available(self) -> bool:
+        """False while the backend is in its post-failure cooldown window."""
+        return self._backend_healthy or (time.monotonic() - self._last_failure_ts) >= self._cooldown
+
+    async def _save_to_backend(self, payload: dict) -> Optional[str]:
+        """POST the IO config to the backend. Returns the saved path, or None if not saved."""
+        if not self._backend_available():
+            logger.info(f"[{self.name}] Backend marked down, skipping save (state already updated)")
+            return None
+
+        try:
+            session = await self._get_session()
+            async with session.post(self.api_url, json=payload, timeout=self._timeout) as response:
+                if 200 <= response.status < 300:
+                    self._backend_healthy = True
+                    data = await response.json()
+                    saved_path = data.get("savedPath")
+                    logger.info(f"[{self.name}] Saved to backend: {saved_path}")
+                    return saved_path
+                logger.warning(f"[{self.name}] Backend save failed: {response.status}")
+
+        except (aiohttp.ClientConnectorError, asyncio.TimeoutError) as e:
+            # Backend not running - stop trying for the cooldown period
+            self._backend_healthy = False
+            self._last_failure_ts = time.monotonic()
+            logger.warning(f"[{self.name}] Backend unavailable (non-critical), pausing saves for {self._cooldown:.0f}s: {e}")
+        except Exception as e:
+            # Backend not available - that's OK, we already saved to state
+            logger.warning(f"[{self.name}] Backend unavailable (non-critical): {e}")
+        return None
+
+    def _schedule_save(self, payload: dict):
+        """Fire-and-forget backend save; keeps a reference so the task isn't garbage collected."""
+        task = asyncio.create_task(self._save_to_backend(payload))
+        self._pending_saves.add(task)
+        task.add_done_callback(self._pending_saves.discard)
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared backend session, creating it on first use (or after close)."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            # Sessions are bound to the loop they were created on
+            self._session = aiohttp.ClientSession(
+                headers=self._headers,
+                connector=aiohttp.TCPConnector(limit=32, keepalive_timeout=60),
+            )
+            self._session_loop = loop
+            self._track_session()
+        return self._session
+
+    async def close(self):
+        """Close the shared backend session (after any scheduled saves finish)."""
+        if self._pending_saves:
+            await asyncio.gather(*self._pending_saves, return_exceptions=True)
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
 
     async def extract_io_config(
         self,
@@ -54,9 +126,10 @@ class ProjectIOTool(BaseTool):
 
         Returns:
             dict with keys:
-                - success (bool): True if configuration was saved
+                - success (bool): True if configuration was saved to state
                 - message (str): Status message
-                - savedPath (str): Path where config was saved
+                - savedPath (str | None): Path where the backend saved the config; None when
+                  the backend save is only scheduled (the default) or the backend is unavailable
                 - stats (dict): Count of actions and transitions saved
         """
         logger.info(f"[{self.name}] Processing IO for project: {project_path}")
@@ -81,35 +154,31 @@ class ProjectIOTool(BaseTool):
             logger.info(f"[{self.name}] Wrote io_data to tool_context.state")
 
         # 3. Try to save to backend (optional - may not be running)
+        # Shares the io_data dict (the JSON serializer only reads it)
+        payload = {
+            "projectPath": project_path,
+            "simulation": io_data
+        }
         saved_path = None
-        try:
-            headers = {"x-agent-secret": "antigravity-local-agent"}
-            async with aiohttp.ClientSession(headers=headers) as session:
-                payload = {
-                    "projectPath": project_path,
-                    "simulation": {
-                        "variables": transition_variables,
-                        "actions": actions
-                    }
-                }
-
-                timeout = aiohttp.ClientTimeout(total=3)  # Short timeout
-                async with session.post(self.api_url, json=payload, timeout=timeout) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        saved_path = data.get("savedPath")
-                        logger.info(f"[{self.name}] Saved to backend: {saved_path}")
-                    else:
-                        logger.warning(f"[{self.name}] Backend save failed: {response.status}")
-
-        except Exception as e:
-            # Backend not available - that's OK, we already saved to state
-            logger.warning(f"[{self.name}] Backend unavailable (non-critical): {e}")
+        if self.await_backend:
+            async with asyncio.TaskGroup() as tg:
+                save_task = tg.create_task(self._save_to_backend(payload))
+            saved_path = save_task.result()
+        else:
+            # _save_to_backend handles its own errors, so nothing is lost by not awaiting it
+            self._schedule_save(payload)
 
         # 4. Success - IO data is in state
+        counts = f"{len(actions)} actions, {len(transition_variables)} variables"
+        if saved_path:
+            message = f"IO Configuration saved: {counts}"
+        elif self.await_backend:
+            message = f"IO Configuration saved to state, backend save failed: {counts}"
+        else:
+            message = f"IO Configuration saved to state, backend save scheduled: {counts}"
         return {
             "success": True,
-            "message": f"IO Configuration saved: {len(actions)} actions, {len(transition_variables)} variables",
+            "message": message,
             "savedPath": saved_path,
             "stats": {
                 "actions": len(actions),
@@ -1,8 +1,22 @@
 import os
 import json
+import time
+import asyncio
+import logging
+from functools import lru_cache
 from typing import Optional, AsyncGenerator
 import google.generativeai as genai
 
+logger = logging.getLogger(__name__)
+
+# Sampling settings shared by every call - bound to the model once instead of per request
+GENERATION_CONFIG = {
+    "temperature": 0.7,
+    "top_p": 0.95,
+    "top_k": 40,
+    "max_output_tokens": 8192,
+}
+
 class GeminiProvider:
     """Provider for Gemini 3 Flash supporting streaming and thinking processes."""
     def __init__(self, model_name: str = "gemini-3-pro-preview"):
@@ -14,69 +28,116 @@ class GeminiProvider:
         
         genai.configure(api_key=api_key)
         self.model_name = model_name
-        self.model = genai.GenerativeModel(model_name)
+        self.model = genai.GenerativeModel(model_name, generation_config=GENERATION_CONFIG)
+        # One model per distinct system prompt: the prompt goes out as system_instruction
+        # (a stable prefix Gemini can cache) instead of being glued onto every request
+        self._model_for = lru_cache(maxsize=16)(self._build_model)
         print(f"[GEMINI] Initialized {model_name}")
 
+    def _build_model(self, system_prompt: str) -> "genai.GenerativeModel":
+        """Model bound to system_prompt (the base model when there is none)."""
+        if not system_prompt:
+            return self.model
+        return genai.GenerativeModel(
+            self.model_name,
+            generation_config=GENERATION_CONFIG,
+            system_instruction=system_prompt,
+        )
+
     async def generate_stream(
         self, 
         prompt: str, 
         system_prompt: str = "",
         on_thinking: callable = None,
-        on_tool: callable = None
+        on_tool: callable = None,
+        max_chars: int = 64,
+        max_delay: float = 0.02
     ) -> AsyncGenerator[str, None]:
         """
         Streams text chunks from Gemini with thinking and tool usage callbacks.
+
+        Small chunks are coalesced: text is yielded once `max_chars` are buffered
+        or `max_delay` seconds have passed since the first buffered chunk (even if
+        no further chunk arrives, e.g. while the model thinks or runs a tool), and
+        the remainder is flushed when the stream ends.
         
         Args:
             prompt: User prompt
             system_prompt: System instructions
             on_thinking: Callback for thinking/reasoning tokens
             on_tool: Callback when tool is used
+            max_chars: Buffered size that triggers a yield
+            max_delay: Max seconds a chunk waits in the buffer
         """
-        print(f"[GEMINI] Streaming response for: {prompt[:50]}...")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"[GEMINI] Streaming response for: {prompt[:50]}...")
         
+        parts = []
+        size = 0
+        deadline = 0.0
+        next_chunk = None
         try:
-            # Combine system prompt and user prompt
-            full_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
-            
-            # Stream response from Gemini
-            response = await self.model.generate_content_async(
-                full_prompt,
-                stream=True,
-                generation_config={
-                    "temperature": 0.7,
-                    "top_p": 0.95,
-                    "top_k": 40,
-                    "max_output_tokens": 8192,
-                }
-            )
-            
-            async for chunk in response:
-                if chunk.text:
-                    yield chunk.text
+            # Stream response from Gemini (system prompt travels as system_instruction)
+            model = self._model_for(system_prompt)
+            response = await model.generate_content_async(prompt, stream=True)
+            stream = aiter(response)
+
+            while True:
+                # The next chunk is awaited as a task, so a buffered chunk can be flushed
+                # at its deadline without cancelling (and losing) the pending read
+                if next_chunk is None:
+                    next_chunk = asyncio.ensure_future(anext(stream))
+                timeout = max(0.0, deadline - time.monotonic()) if parts else None
+                done, _ = await asyncio.wait((next_chunk,), timeout=timeout)
+                if not done:
+                    batch = "".join(parts)
+                    parts.clear()
+                    size = 0
+                    yield batch
+                    continue
+
+                chunk_task, next_chunk = next_chunk, None
+                try:
+                    chunk = chunk_task.result()
+                except StopAsyncIteration:
+                    break
+                text = chunk.text
+                if not text:
+                    continue
+                if not parts:
+                    deadline = time.monotonic() + max_delay
+                parts.append(text)
+                size += len(text)
+                if size >= max_chars or time.monotonic() >= deadline:
+                    batch = "".join(parts)
+                    parts.clear()
+                    size = 0
+                    yield batch
+
+            if parts:
+                yield "".join(parts)
                     
         except Exception as e:
             print(f"[GEMINI] Streaming Error: {e}")
+            if parts:
+                # Text received before the error still goes out
+                yield "".join(parts)
             yield f"Error: {str(e)}"
+        finally:
+            # Consumer stopped early (or we were cancelled) - don't leave the read running
+            if next_chunk is not None:
+                next_chunk.cancel()
     
     async def generate(self, prompt: str, system_prompt: str = "") -> str:
         """
         Generate complete response from Gemini
         """
-        print(f"[GEMINI] Generating response for: {prompt[:50]}...")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"[GEMINI] Generating response for: {prompt[:50]}...")
         
         try:
-            full_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
-            
-            response = await self.model.generate_content_async(
-                full_prompt,
-                generation_config={
-                    "temperature": 0.7,
-                    "top_p": 0.95,
-                    "top_k": 40,
-                    "max_output_tokens": 8192,
-                }
-            )
+            model = self._model_for(system_prompt)
+            response = await model.generate_content_async(prompt)
             
             return response.text
             
@@ -85,9 +146,11 @@ class GeminiProvider:
             return f"Error: {str(e)}"
 
 # Global instance factory
-def get_provider():
+@lru_cache(maxsize=None)
+def get_provider(model_name: str = "gemini-3-pro-preview"):
     """
-    Returns the Gemini provider instance
+    Returns the shared Gemini provider instance for model_name
     Uses gemini-3-pro-preview for best performance
+    (genai.configure and model construction happen once per model)
     """
-    return GeminiProvider(model_name="gemini-3-pro-preview")
+    return GeminiProvider(model_name=model_name)
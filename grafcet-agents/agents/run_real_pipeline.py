@@ -11,7 +11,16 @@ Run with: python run_real_pipeline.py
 
 import os
 import sys
+import atexit
 import asyncio
+import importlib
+import logging
+import logging.handlers
+import queue
+import random
+import reprlib
+import time
+import traceback
 
 # Fix Windows console encoding
 if sys.platform == 'win32':
@@ -22,6 +31,17 @@ if sys.platform == 'win32':
 from dotenv import load_dotenv
 load_dotenv()
 
+# Console output goes through a background listener thread, so the event loop
+# consuming the agent stream never blocks on (line-flushed) stdout writes
+_console_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+_console_listener = logging.handlers.QueueListener(_console_queue, logging.StreamHandler(sys.stdout))
+console = logging.getLogger("run_real_pipeline")
+console.setLevel(logging.INFO)
+console.propagate = False
+console.addHandler(logging.handlers.QueueHandler(_console_queue))
+_console_listener.start()
+atexit.register(_console_listener.stop)
+
 # Colors for output
 GREEN = "\033[92m"
 RED = "\033[91m"
@@ -54,27 +74,59 @@ VIBE_PROMPT = """Build the complete automation project from this specification:
 Execute all agents in sequence: SpecAnalyst → GsrsmEngineer → ConductSFC → ModeSFCs"""
 
 
+def retry_delay(error: Exception, attempt: int, base: float = 5.0, cap: float = 60.0) -> float:
+    """Seconds to wait before retry `attempt` (1-based) of an overloaded request.
+
+    Honors a Retry-After header when the error carries the HTTP response,
+    otherwise uses exponential backoff with full jitter so concurrent runs
+    don't retry in lockstep.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        retry_after = headers.get("retry-after")
+        try:
+            if retry_after is not None:
+                return min(cap, max(0.0, float(retry_after)))
+        except ValueError:
+            pass  # HTTP-date form - fall back to backoff
+    return min(cap, random.uniform(1.0, base * 2 ** (attempt - 1)))
+
+
+# Bounded repr for tool-call args: formats only what is shown, however large the args
+_ARG_REPR = reprlib.Repr()
+_ARG_REPR.maxstring = 100
+_ARG_REPR.maxother = 100
+_ARG_REPR.maxdict = 6
+_ARG_REPR.maxlist = 6
+
+AGENT_COLORS = {
+    "Orchestrator": MAGENTA,
+    "SpecGenerator": CYAN,
+    "SpecAnalyst": GREEN,
+    "GsrsmEngineer": YELLOW,
+    "ConductSFCAgent": CYAN,
+    "ModeSFC": GREEN,
+    "SimulationAgent": MAGENTA,
+    "ThinkingForge": BOLD,
+}
+# Colored "[Agent] " prefixes, formatted once per agent name
+_AGENT_PREFIXES = {name: f"{color}[{name}]{RESET} " for name, color in AGENT_COLORS.items()}
+
+
 def log_agent(agent_name: str, message: str):
     """Log agent output with color coding."""
-    colors = {
-        "Orchestrator": MAGENTA,
-        "SpecGenerator": CYAN,
-        "SpecAnalyst": GREEN,
-        "GsrsmEngineer": YELLOW,
-        "ConductSFCAgent": CYAN,
-        "ModeSFC": GREEN,
-        "SimulationAgent": MAGENTA,
-        "ThinkingForge": BOLD,
-    }
-    color = colors.get(agent_name, RESET)
-    print(f"{color}[{agent_name}]{RESET} {message}")
+    prefix = _AGENT_PREFIXES.get(agent_name)
+    if prefix is None:
+        prefix = _AGENT_PREFIXES[agent_name] = f"{RESET}[{agent_name}]{RESET} "
+    console.info(prefix + message)
 
 
 def log_section(title: str):
     """Log section header."""
-    print(f"\n{BOLD}{'='*70}{RESET}")
-    print(f"  {BOLD}{title}{RESET}")
-    print(f"{BOLD}{'='*70}{RESET}\n")
+    console.info(f"\n{BOLD}{'='*70}{RESET}")
+    console.info(f"  {BOLD}{title}{RESET}")
+    console.info(f"{BOLD}{'='*70}{RESET}\n")
 
 
 async def main():
@@ -85,13 +137,13 @@ async def main():
     # Step 1: Check API Key
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
-        print(f"{RED}❌ GEMINI_API_KEY not set in environment{RESET}")
+        console.info(f"{RED}❌ GEMINI_API_KEY not set in environment{RESET}")
         return False
     log_agent("Orchestrator", f"✅ Gemini API key found")
     
     # Step 2: Check PDF exists
     if not os.path.exists(PDF_PATH):
-        print(f"{RED}❌ PDF not found: {PDF_PATH}{RESET}")
+        console.info(f"{RED}❌ PDF not found: {PDF_PATH}{RESET}")
         return False
     log_agent("Orchestrator", f"📄 PDF: {PDF_PATH}")
     log_agent("Orchestrator", f"📁 Project: {PROJECT_PATH}")
@@ -103,14 +155,28 @@ async def main():
     client = genai.Client(api_key=api_key)
     
     log_agent("Orchestrator", "Uploading PDF to Gemini...")
-    uploaded_file = client.files.upload(file=PDF_PATH)
+
+    async def timed(label: str, coro):
+        """Await coro and log how long it took."""
+        start = time.perf_counter()
+        result = await coro
+        log_agent("Orchestrator", f"⏱️ {label}: {time.perf_counter() - start:.2f}s")
+        return result
+
+    # The upload and the SpecGenerator import are independent - run them together.
+    # If either fails, the TaskGroup cancels the other instead of letting it run on.
+    async with asyncio.TaskGroup() as tg:
+        # Native async upload (client.aio) - nothing blocks the event loop or holds a pool thread
+        upload_task = tg.create_task(timed("PDF upload", client.aio.files.upload(file=PDF_PATH)))
+        tg.create_task(timed("spec_generator import", asyncio.to_thread(importlib.import_module, "spec_generator")))
+    uploaded_file = upload_task.result()
     log_agent("Orchestrator", f"✅ Uploaded: {uploaded_file.name}")
     log_agent("Orchestrator", f"   URI: {uploaded_file.uri}")
     
     # Step 4: Generate spec.md using SpecGenerator (same as orchestrator.py)
     log_section("Step 2: Generate spec.md from PDF (SpecGenerator)")
     
-    from spec_generator import spec_generator
+    from spec_generator import spec_generator  # already imported by the task above
     
     spec_chunks = []
     async def stream_callback(chunk: str):
@@ -118,18 +184,23 @@ async def main():
         # Print first 100 chars of each chunk
         preview = chunk[:80].replace('\n', ' ')
         if preview:
-            print(f"{CYAN}  ...{preview}...{RESET}")
+            console.info(f"{CYAN}  ...{preview}...{RESET}")
     
     log_agent("SpecGenerator", "Analyzing PDF and generating specification...")
-    spec_result = await spec_generator.generate_spec_from_pdf(
-        file_uri=uploaded_file.uri,
-        mime_type="application/pdf",
-        project_path=PROJECT_PATH,
-        stream_callback=stream_callback
-    )
+    # Spec generation is network-bound: import the ADK runtime and swarm definitions
+    # (the heaviest imports of the run) on a worker thread meanwhile
+    async with asyncio.TaskGroup() as tg:
+        spec_task = tg.create_task(spec_generator.generate_spec_from_pdf(
+            file_uri=uploaded_file.uri,
+            mime_type="application/pdf",
+            project_path=PROJECT_PATH,
+            stream_callback=stream_callback
+        ))
+        tg.create_task(timed("adk_swarm import", asyncio.to_thread(importlib.import_module, "adk_swarm")))
+    spec_result = spec_task.result()
     
     if not spec_result.success:
-        print(f"{RED}❌ Spec generation failed: {spec_result.error}{RESET}")
+        console.info(f"{RED}❌ Spec generation failed: {spec_result.error}{RESET}")
         return False
     
     spec_content = spec_result.spec_content
@@ -139,9 +210,11 @@ async def main():
     log_section("Step 3: Run ADK Orchestrator (ThinkingForge)")
     
     from google.adk.runners import Runner
+    from google.adk.apps import App
+    from google.adk.agents.context_cache_config import ContextCacheConfig
     from google.adk.sessions import InMemorySessionService
     from google.genai.types import Content, Part
-    from adk_swarm import get_configured_swarm
+    from adk_swarm import get_configured_swarm  # already imported during spec generation
     
     # Build enhanced prompt (same as orchestrator.py lines 640-648)
     enhanced_prompt = f"""[PROJECT CONTEXT]
@@ -166,7 +239,15 @@ User request: {VIBE_PROMPT}"""
     # Create configured swarm (same as orchestrator.py line 718-726)
     swarm = get_configured_swarm(model=MODEL, thinking_level="low")
     session_service = InMemorySessionService()
-    runner = Runner(agent=swarm, app_name="real_test", session_service=session_service)
+    # Gemini context caching: every agent turn re-sends the same prefix (instruction +
+    # the spec-laden first message), so ADK caches it after the first request and
+    # later turns are billed/prefilled as cached tokens
+    app = App(
+        name="real_test",
+        root_agent=swarm,
+        context_cache_config=ContextCacheConfig(ttl_seconds=600, cache_intervals=10),
+    )
+    runner = Runner(app=app, session_service=session_service)
     
     # Create session with state (same as orchestrator.py)
     # Include spec_content in state so agents can access it
@@ -183,13 +264,16 @@ User request: {VIBE_PROMPT}"""
     
     log_agent("ThinkingForge", f"Session created: {session.id}")
     log_agent("ThinkingForge", "Starting agent pipeline...")
-    print()
+    console.info("")
     
     # Run the orchestrator and stream events (same as orchestrator.py lines 738-856)
     message = Content(role="user", parts=[Part(text=enhanced_prompt)])
     current_agent = "ThinkingForge"
     event_count = 0
-    full_response = ""
+    full_response_parts = []
+    append_response = full_response_parts.append  # bound once, called per text part
+    prompt_tokens = 0
+    cached_tokens = 0
 
     # Retry logic for 503 errors
     max_retries = 3
@@ -203,43 +287,51 @@ User request: {VIBE_PROMPT}"""
                 new_message=message
             ):
                 event_count += 1
-                agent_name = getattr(event, 'author', None) or current_agent
+                agent_name = event.author or current_agent
 
-                # Debug: show event type
-                event_type = type(event).__name__
+                # Token accounting (cached_content_token_count = prefix served from the cache)
+                usage = event.usage_metadata
+                if usage is not None and not event.partial:
+                    prompt_tokens += usage.prompt_token_count or 0
+                    cached_tokens += usage.cached_content_token_count or 0
 
                 # Track agent handoffs
                 if agent_name != current_agent and agent_name != 'user':
-                    print()
+                    console.info("")
                     log_agent(agent_name, f"🔄 Agent activated")
                     current_agent = agent_name
 
                 # Process content
-                if hasattr(event, 'content') and event.content and hasattr(event.content, 'parts'):
-                    for part in event.content.parts:
+                # (Event/Part are pydantic models: every field exists, so read each once, no hasattr)
+                content = event.content
+                parts = content.parts if content is not None else None
+                if parts:
+                    for part in parts:
+                        text = part.text
+
                         # Thinking output
-                        if getattr(part, 'thought', False) and hasattr(part, 'text') and part.text:
-                            thought_preview = part.text[:100].replace('\n', ' ')
+                        if text and part.thought:
+                            thought_preview = text[:100].replace('\n', ' ')
                             log_agent(agent_name, f"🧠 {thought_preview}...")
 
                         # Text output
-                        elif hasattr(part, 'text') and part.text:
-                            full_response += part.text
-                            text_preview = part.text[:100].replace('\n', ' ')
+                        elif text:
+                            append_response(text)
+                            text_preview = text[:100].replace('\n', ' ')
                             log_agent(agent_name, f"💬 {text_preview}...")
 
                         # Tool calls
-                        if hasattr(part, 'function_call') and part.function_call:
-                            fc = part.function_call
-                            args_preview = str(fc.args)[:100] if hasattr(fc, 'args') else ''
+                        fc = part.function_call
+                        if fc:
+                            args_preview = _ARG_REPR.repr(fc.args) if fc.args else ''
                             log_agent(agent_name, f"🔧 Tool call: {fc.name}")
                             if args_preview:
                                 log_agent(agent_name, f"   Args: {args_preview}...")
 
                         # Tool results - show detailed info
-                        if hasattr(part, 'function_response') and part.function_response:
-                            fr = part.function_response
-                            resp = getattr(fr, 'response', {}) or {}
+                        fr = part.function_response
+                        if fr:
+                            resp = fr.response or {}
                             if isinstance(resp, dict):
                                 success = resp.get('success', True)
                                 msg = resp.get('message', '')
@@ -251,7 +343,7 @@ User request: {VIBE_PROMPT}"""
                                 log_agent(agent_name, f"📦 Tool result: {fr.name}")
                 else:
                     # Event without content
-                    log_agent(agent_name, f"📨 Event: {event_type}")
+                    log_agent(agent_name, f"📨 Event: {type(event).__name__}")
 
             # If we get here, no error - break the retry loop
             break
@@ -259,28 +351,33 @@ User request: {VIBE_PROMPT}"""
         except Exception as e:
             retry_count += 1
             error_msg = str(e)
-            if "503" in error_msg or "overloaded" in error_msg.lower():
+            is_overloaded = "503" in error_msg or "overloaded" in error_msg.lower()
+            if is_overloaded:
                 if retry_count < max_retries:
-                    log_agent("Orchestrator", f"⚠️ Model overloaded, retrying ({retry_count}/{max_retries})...")
-                    await asyncio.sleep(5)  # Wait 5 seconds before retry
+                    delay = retry_delay(e, retry_count)
+                    log_agent("Orchestrator", f"⚠️ Model overloaded, retrying in {delay:.1f}s ({retry_count}/{max_retries})...")
+                    await asyncio.sleep(delay)
                     continue
+            # Terminal failure only - retried 503s never reach the stack formatting
             log_agent("Orchestrator", f"❌ Error: {error_msg[:200]}")
-            import traceback
-            traceback.print_exc()
+            console.info(traceback.format_exc())  # via the queue, so it stays in order
             return False
 
+    full_response = "".join(full_response_parts)
+
     # Summary
     log_section("Pipeline Complete")
     log_agent("Orchestrator", f"Total events processed: {event_count}")
     log_agent("Orchestrator", f"Response length: {len(full_response)} chars")
+    log_agent("Orchestrator", f"Prompt tokens: {prompt_tokens} ({cached_tokens} served from context cache)")
     
     if full_response:
-        print(f"\n{BOLD}Final Response:{RESET}")
-        print(full_response[:500] + "..." if len(full_response) > 500 else full_response)
+        console.info(f"\n{BOLD}Final Response:{RESET}")
+        console.info(full_response[:500] + "..." if len(full_response) > 500 else full_response)
     
-    print(f"\n{GREEN}{'='*70}{RESET}")
-    print(f"{GREEN}  🎉 Pipeline completed successfully!{RESET}")
-    print(f"{GREEN}{'='*70}{RESET}\n")
+    console.info(f"\n{GREEN}{'='*70}{RESET}")
+    console.info(f"{GREEN}  🎉 Pipeline completed successfully!{RESET}")
+    console.info(f"{GREEN}{'='*70}{RESET}\n")
     
     return True
 
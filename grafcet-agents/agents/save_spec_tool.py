@@ -9,6 +9,7 @@ The spec.md serves as the project's context document containing:
 4. Process flow and requirements
 """
 
+import asyncio
 import logging
 import aiohttp
 from typing import List, Optional
@@ -16,6 +17,31 @@ from base_tool import BaseTool
 
 logger = logging.getLogger(__name__)
 
+# spec_content can be tens of KB of Markdown; orjson encodes it straight to UTF-8 bytes
+try:
+    import orjson
+
+    _dumps_bytes = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    import json
+
+    def _dumps_bytes(obj) -> bytes:
+        """Serialize a request payload to UTF-8 JSON bytes."""
+        return json.dumps(obj).encode("utf-8")
+
+    _loads = json.loads
+
+# Bodies larger than one chunk are streamed with chunked transfer encoding
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+async def _iter_chunks(body: bytes, chunk_size: int = UPLOAD_CHUNK_SIZE):
+    """Yield the body in chunk_size slices (views, no copies)."""
+    view = memoryview(body)
+    for start in range(0, len(view), chunk_size):
+        yield view[start:start + chunk_size]
+
 
 class SaveSpecTool(BaseTool):
     """
@@ -31,6 +57,30 @@ class SaveSpecTool(BaseTool):
             description="Saves the analyzed specification as a Markdown file (spec.md) in the project.",
         )
         self.api_url = api_url
+        self._headers = {"x-agent-secret": "antigravity-local-agent", "Content-Type": "application/json"}
+        self._timeout = aiohttp.ClientTimeout(total=10)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared backend session, creating it on first use (or after close)."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            # Sessions are bound to the loop they were created on
+            self._session = aiohttp.ClientSession(
+                headers=self._headers,
+                connector=aiohttp.TCPConnector(limit=32, keepalive_timeout=60),
+                timeout=self._timeout,
+            )
+            self._session_loop = loop
+            self._track_session()
+        return self._session
+
+    async def close(self):
+        """Close the shared backend session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
 
     async def execute(
         self,
@@ -64,25 +114,26 @@ class SaveSpecTool(BaseTool):
 
         # Send to backend API
         try:
-            headers = {"x-agent-secret": "antigravity-local-agent"}
-            async with aiohttp.ClientSession(headers=headers) as session:
-                payload = {
-                    "projectPath": project_path,
-                    "specContent": spec_content
-                }
-
-                timeout = aiohttp.ClientTimeout(total=10)
-                async with session.post(self.api_url, json=payload, timeout=timeout) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return {
-                            "success": True,
-                            "message": "Specification saved to spec.md",
-                            "savedPath": data.get("savedPath")
-                        }
-                    else:
-                        error_text = await response.text()
-                        return {"success": False, "message": "Backend Save Failed", "error": error_text}
+            session = await self._get_session()
+            body = _dumps_bytes({
+                "projectPath": project_path,
+                "specContent": spec_content
+            })
+
+            # aiohttp sends an async iterator as a chunked body
+            data = _iter_chunks(body) if len(body) > UPLOAD_CHUNK_SIZE else body
+
+            async with session.post(self.api_url, data=data) as response:
+                if response.status == 200:
+                    data = _loads(await response.read())
+                    return {
+                        "success": True,
+                        "message": "Specification saved to spec.md",
+                        "savedPath": data.get("savedPath")
+                    }
+                else:
+                    error_text = await response.text()
+                    return {"success": False, "message": "Backend Save Failed", "error": error_text}
 
         except Exception as e:
             logger.error(f"[{self.name}] Execution failed: {e}")
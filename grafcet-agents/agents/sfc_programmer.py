@@ -4,13 +4,25 @@ Supports single and hierarchical SFC architectures.
 """
 
 import asyncio
+import hashlib
+import io
 import logging
 import json
-from dataclasses import dataclass, field
-from typing import List, Dict, Any, Optional
+import re
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field, replace
+from functools import cached_property, lru_cache
+from string import Template
+from typing import AsyncIterator, List, Dict, Any, Optional
 from datetime import datetime
-from google import adk
+try:
+    from google import adk
+    _ADK_AVAILABLE = True
+except ImportError:  # loop still runs on the template fallback
+    adk = None
+    _ADK_AVAILABLE = False
 from compile_save_tool import CompileAndSaveSFCTool
+from prompts import StaticInstruction
 
 logger = logging.getLogger(__name__)
 
@@ -29,17 +41,18 @@ class ModeContext:
     category: str = "A"             # A, D, or F
     conduct_step: int = 1           # Step number in Conduct SFC (1, 2, 3...)
 
-    @property
+    @cached_property
     def step_offset(self) -> int:
         """
         Calculate step number offset based on Conduct SFC position.
+        Computed once per mode (conduct_step is fixed after construction).
         Mode at Conduct Step N → Steps start at N0.
         Example: conduct_step=1 → step_offset=10
         Example: conduct_step=2 → step_offset=20
         """
         return self.conduct_step * 10
 
-@dataclass
+@dataclass(slots=True)
 class IOContext:
     """Project IO configuration from SpecAnalyst."""
     variables: List[Dict[str, Any]]  # Sensors, buttons, inputs
@@ -50,7 +63,7 @@ class IOContext:
 # Hierarchical SFC Architecture Data Classes
 # ============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class SFCFileSpec:
     """Specification for a single SFC file in a mode's architecture."""
     name: str                       # e.g., "main", "fill_task", "cap_task"
@@ -58,7 +71,7 @@ class SFCFileSpec:
     is_main: bool = False           # True if this is the orchestrator SFC
     called_by: Optional[str] = None # Name of parent SFC (None for main)
 
-@dataclass
+@dataclass(slots=True)
 class ModeArchitecture:
     """Architecture decision for a single mode."""
     mode_id: str
@@ -66,7 +79,7 @@ class ModeArchitecture:
     files: List[SFCFileSpec] = field(default_factory=list)
     reasoning: str = ""             # Explanation for the architecture decision
 
-@dataclass
+@dataclass(slots=True)
 class SFCFileResult:
     """Result of compiling a single SFC file."""
     name: str                       # e.g., "main", "fill_task"
@@ -76,7 +89,7 @@ class SFCFileResult:
     attempts: int = 0
     sfc_code: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class ModeResult:
     """Result of processing a single mode (supports multiple files)."""
     mode_id: str
@@ -108,32 +121,42 @@ class ModeResult:
                 return f.sfc_code
         return self.files[0].sfc_code if self.files else None
 
-@dataclass
+@dataclass(slots=True)
 class SFCProgrammerResult:
     """Overall result of the SFC programming loop."""
     total_modes: int
     successful: int
     failed: int
     results: List[ModeResult] = field(default_factory=list)
+    prompt_tokens: int = 0          # Prompt tokens over all agent calls
+    cached_tokens: int = 0          # ...of which served from the provider's prompt cache
+
+    @property
+    def cache_hit_rate(self) -> float:
+        """Fraction of prompt tokens read from cache (drops when a prompt prefix stops being stable)."""
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
 
     def summary(self) -> str:
         return f"SFC Programming Complete: {self.successful}/{self.total_modes} modes successful"
 
     def detailed_summary(self) -> str:
         """Detailed summary including file counts."""
-        total_files = sum(len(r.files) for r in self.results)
-        successful_files = sum(
-            sum(1 for f in r.files if f.success)
-            for r in self.results
-        )
-        hierarchical_modes = sum(
-            1 for r in self.results if r.architecture == "hierarchical"
-        )
+        # Single pass over modes/files
+        total_files = successful_files = hierarchical_modes = 0
+        for r in self.results:
+            total_files += len(r.files)
+            for f in r.files:
+                if f.success:
+                    successful_files += 1
+            if r.architecture == "hierarchical":
+                hierarchical_modes += 1
         return (
             f"SFC Programming Complete:\n"
             f"  Modes: {self.successful}/{self.total_modes} successful\n"
             f"  Files: {successful_files}/{total_files} compiled\n"
-            f"  Hierarchical modes: {hierarchical_modes}"
+            f"  Hierarchical modes: {hierarchical_modes}\n"
+            f"  Prompt tokens: {self.prompt_tokens} ({self.cached_tokens} cached, "
+            f"{self.cache_hit_rate:.0%} hit rate)"
         )
 
 
@@ -171,16 +194,11 @@ ARCHITECTURE_DECISION_SCHEMA = {
     "required": ["architecture_type", "files", "reasoning"]
 }
 
-
-def create_architecture_decision_agent():
-    """
-    Creates the Architecture Decision Agent that analyzes mode complexity
-    and determines if a single SFC or hierarchical SFC structure is needed.
-    """
-    return adk.Agent(
-        name="ArchitectureDecisionAgent",
-        model="gemini-3-flash-preview",
-        instruction="""You are an expert SFC Architecture Analyst for industrial automation systems.
+# Static system instruction - kept byte-identical across calls so the model
+# provider can reuse the cached prefix; per-mode details go in the user message.
+# Passed as a StaticInstruction: ADK would otherwise run {key} state injection on
+# it every turn, and the literal "{task_name}" below would fail as a missing key.
+ARCHITECTURE_DECISION_INSTRUCTION = """You are an expert SFC Architecture Analyst for industrial automation systems.
 
 ## YOUR ROLE
 Analyze a GSRSM mode's description and complexity to decide between:
@@ -248,7 +266,194 @@ Return a JSON object with:
   "reasoning": "F1 has 3 distinct parallel operations (fill, cap, transport) that benefit from encapsulation"
 }
 ```
-""",
+"""
+
+
+# Architecture decisions shared across loops/projects in this process. Standard
+# GSRSM modes (A1, A6, D1...) recur with the same description, so a repeated
+# structural signature reuses the earlier decision instead of another LLM round-trip.
+ARCHITECTURE_CACHE_SIZE = 256
+_architecture_cache: "OrderedDict[str, ModeArchitecture]" = OrderedDict()
+
+
+def _architecture_signature(mode: "ModeContext", action_names: List[str]) -> str:
+    """Structural hash of a mode for the architecture decision.
+
+    Covers what the decision depends on (category, description, conditions,
+    available actions), whitespace/case-normalized with condition order ignored.
+    The mode id and name are labels only, so e.g. A5/A6 with the same
+    description share one decision.
+    """
+    def norm(text: str) -> str:
+        return " ".join(str(text).split()).lower()
+
+    parts = [
+        mode.category,
+        norm(mode.description)[:512],
+        "|".join(sorted(norm(c) for c in mode.entry_conditions)),
+        "|".join(sorted(norm(c) for c in mode.exit_conditions)),
+        ",".join(action_names),
+    ]
+    return hashlib.blake2b("\0".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+@lru_cache(maxsize=512)
+def _render_conditions(conditions: tuple) -> str:
+    """Bullet list of mode entry/exit conditions for a prompt (same text across files and retries)."""
+    return "\n".join(f"- {c}" for c in conditions) if conditions else "- None specified"
+
+
+def _usage_field(record: Any, name: str) -> Any:
+    """Read a usage field from an object or a dict."""
+    if record is None:
+        return None
+    if isinstance(record, dict):
+        return record.get(name)
+    return getattr(record, name, None)
+
+
+def _usage_tokens(source: Any) -> tuple:
+    """(prompt_tokens, cached_tokens) of an LLM response/event; (0, 0) without usage data.
+
+    Understands Gemini usage_metadata (prompt_token_count / cached_content_token_count)
+    and OpenAI-compatible usage (prompt_tokens / prompt_tokens_details.cached_tokens).
+    """
+    usage = _usage_field(source, "usage_metadata")
+    if usage is not None:
+        return (
+            _usage_field(usage, "prompt_token_count") or 0,
+            _usage_field(usage, "cached_content_token_count") or 0,
+        )
+    usage = _usage_field(source, "usage")
+    if usage is not None:
+        details = _usage_field(usage, "prompt_tokens_details")
+        return _usage_field(usage, "prompt_tokens") or 0, _usage_field(details, "cached_tokens") or 0
+    return 0, 0
+
+
+class _EarlyStop(BaseException):
+    """Raised from a stream callback to end an agent run once its tool call succeeded.
+
+    BaseException so the runtime's own `except Exception` handlers don't swallow it.
+    """
+
+
+# Step numbers in SFC DSL code: "Step 12", "Jump 10" and step-activity variables "X12"
+_STEP_NUMBER = re.compile(r'\b(Step\s+|Jump\s+|X)(\d+)\b')
+_STEP_DECLARATION = re.compile(r'^\s*Step\s+(\d+)\b', re.MULTILINE)
+_SFC_TITLE = re.compile(r'^(\s*SFC\s+")([^"\n]*)', re.MULTILINE)
+
+
+def _retarget_sfc_code(sfc_code: str, source: tuple, mode: "ModeContext") -> str:
+    """Adapt SFC code generated for another mode: shift step numbers, swap id/name labels."""
+    source_id, source_name, source_offset = source
+    delta = mode.step_offset - source_offset
+    if delta:
+        # Only numbers of declared steps move - X<n> may just as well be an IO variable
+        steps = set(_STEP_DECLARATION.findall(sfc_code))
+        sfc_code = _STEP_NUMBER.sub(
+            lambda m: f"{m.group(1)}{int(m.group(2)) + delta}" if m.group(2) in steps else m.group(0),
+            sfc_code
+        )
+    if source_id != mode.mode_id:
+        # Outside the title the id only belongs in the mode's activity flag; IO names that
+        # merely contain it (LAMP_A1, PB_A1) are shared by both modes and stay as they are
+        sfc_code = re.sub(
+            rf"\bMODE_{re.escape(source_id)}_ACTIVE\b", f"MODE_{mode.mode_id}_ACTIVE", sfc_code
+        )
+    id_label = re.compile(rf"(?<![A-Za-z0-9_]){re.escape(source_id)}(?![A-Za-z0-9_])")
+
+    def retitle(match: "re.Match") -> str:
+        title = id_label.sub(mode.mode_id, match.group(2))
+        if source_name and source_name != mode.name:
+            title = title.replace(source_name, mode.name)
+        return match.group(1) + title
+
+    # Id and name are otherwise labels in the SFC title only; elsewhere the text may be logic
+    return _SFC_TITLE.sub(retitle, sfc_code, count=1)
+
+
+# Fallback SFC templates (used when the ADK runtime is unavailable), parsed once
+_FALLBACK_MAIN_TEMPLATE = Template('''SFC "Mode $mode_id - Main Orchestrator"
+Step 0 (Initial)
+Transition T0 "MODE_${mode_id}_ACTIVE AND NOT E_STOP"
+Step 1 (Macro)
+    LinkedFile "task_1"
+Transition T1 "TASK_1_COMPLETE"
+Step 2 (Macro)
+    LinkedFile "task_2"
+Transition T2 "TASK_2_COMPLETE"
+Step 0 (Initial)''')
+
+_FALLBACK_TASK_TEMPLATE = Template('''SFC "$task_name Task"
+Step 0 (Initial)
+Transition T0 "TASK_START"
+Step 1
+    Action ${task_name}_ACTION (N)
+Transition T1 "${task_name}_DONE"
+Step 0 (Initial)''')
+
+# Standard single SFC templates per mode id
+_FALLBACK_SFC_TEMPLATES: Dict[str, Template] = {
+    "A1": Template('''SFC "Mode A1 - Initial State"
+Step 0 (Initial)
+Transition T0 "PB_START AND NOT E_STOP"
+Step 1
+Transition T1 "S_READY"
+Step 0 (Initial)'''),
+    "F1": Template('''SFC "Mode F1 - Normal Production"
+Step 0 (Initial)
+Transition T0 "MODE_F1_ACTIVE AND NOT E_STOP"
+Step 1
+Transition T1 "S_PROCESS_COMPLETE"
+Step 2
+Transition T2 "S_CYCLE_DONE"
+Step 0 (Initial)'''),
+    "D1": Template('''SFC "Mode D1 - Emergency Stop"
+Step 0 (Initial)
+Transition T0 "E_STOP"
+Step 1
+Transition T1 "PB_RESET AND NOT E_STOP"
+Step 0 (Initial)'''),
+    "A5": Template('''SFC "Mode A5 - Restart Preparation"
+Step 0 (Initial)
+Transition T0 "PB_RESTART AND NOT E_STOP"
+Step 1
+Transition T1 "S_HOME_POS"
+Step 0 (Initial)'''),
+    "A6": Template('''SFC "Mode A6 - Reset to Initial"
+Step 0 (Initial)
+Transition T0 "PB_RESET"
+Step 1
+Transition T1 "S_RESET_COMPLETE"
+Step 0 (Initial)'''),
+}
+
+_FALLBACK_DEFAULT_TEMPLATE = Template('''SFC "Mode $mode_id - $name"
+Step 0 (Initial)
+Transition T0 "START_CONDITION"
+Step 1
+Transition T1 "END_CONDITION"
+Step 0 (Initial)''')
+
+
+# Task SFCs used when a mode is complex enough to go hierarchical without an LLM decision
+_HIERARCHICAL_TASK_SPLIT = (
+    ("startup_task", "Mode entry sequence: bring the equipment into its operating state"),
+    ("cycle_task", "Main operating cycle of the mode"),
+    ("shutdown_task", "Mode exit sequence: bring the equipment back to a safe state"),
+)
+
+
+def create_architecture_decision_agent():
+    """
+    Creates the Architecture Decision Agent that analyzes mode complexity
+    and determines if a single SFC or hierarchical SFC structure is needed.
+    """
+    return adk.Agent(
+        name="ArchitectureDecisionAgent",
+        model="gemini-3-flash-preview",
+        instruction=StaticInstruction(ARCHITECTURE_DECISION_INSTRUCTION),
         output_schema=ARCHITECTURE_DECISION_SCHEMA
     )
 
@@ -257,12 +462,8 @@ Return a JSON object with:
 # SFC Programmer Agent Definition (Enhanced for Hierarchical Support)
 # ============================================================================
 
-def create_sfc_programmer_agent():
-    """Creates the SFC Programmer agent for single or hierarchical SFC generation."""
-    return adk.Agent(
-        name="SFCProgrammer",
-        model="gemini-3-flash-preview",
-        instruction="""You are an expert SFC Programmer for the Antigravity GRAFCET platform.
+# Static system instruction (see ARCHITECTURE_DECISION_INSTRUCTION)
+SFC_PROGRAMMER_INSTRUCTION = """You are an expert SFC Programmer for the Antigravity GRAFCET platform.
 
 ## YOUR ROLE
 Generate SFC DSL code for a GSRSM mode. You may be asked to generate:
@@ -401,7 +602,15 @@ EndDivergence
   "sfc_name": "<file name: 'default', 'main', or 'xxx_task'>"
 }
 ```
-""",
+"""
+
+
+def create_sfc_programmer_agent():
+    """Creates the SFC Programmer agent for single or hierarchical SFC generation."""
+    return adk.Agent(
+        name="SFCProgrammer",
+        model="gemini-3-flash-preview",
+        instruction=StaticInstruction(SFC_PROGRAMMER_INSTRUCTION),
         tools=[CompileAndSaveSFCTool().execute]
     )
 
@@ -419,22 +628,88 @@ class SFCProgrammerLoop:
     1. Load mode context
     2. Analyze mode complexity (Architecture Decision Agent)
     3. For hierarchical modes: generate main.sfc + task SFCs
-    4. For single modes: generate default.sfc
+    4. For single modes: generate default.sfc (batched, several modes per agent call)
     5. Compile and validate each file
     6. Retry on failure (max 3 attempts per file)
     7. Process independent modes in parallel
     """
 
+    __slots__ = (
+        "project_path", "io_context", "agent", "architecture_agent", "compile_tool", "results",
+        "_action_names_text", "_project_context", "_architecture_pending", "_sfc_cache",
+        "_batched_files", "max_parallel_agents", "_agent_slots",
+        "_total_prompt_tokens", "_total_cached_tokens",
+    )
+
     MAX_RETRIES = 3
     PARALLEL_MODE_PROCESSING = True  # Enable parallel processing of modes
-
-    def __init__(self, project_path: str, io_context: IOContext):
+    MAX_PARALLEL_AGENTS = 5  # Agent (LLM) calls in flight at once (provider rate limits)
+    ARCH_SIMPLE_THRESHOLD = 5  # Below: single architecture without asking the LLM
+    ARCH_COMPLEX_THRESHOLD = 20  # Above: hierarchical (templated task split) without asking
+    ARCH_SIMPLE_MAX_ACTIONS = 8  # Projects with more actions always get a real decision
+    BATCH_SINGLE_MODES = True  # Generate single-architecture modes several per agent call
+    MODE_BATCH_SIZE = 6  # Modes per batched agent call
+
+    def __init__(
+        self,
+        project_path: str,
+        io_context: IOContext,
+        max_parallel_agents: Optional[int] = None
+    ):
         self.project_path = project_path
         self.io_context = io_context
-        self.agent = create_sfc_programmer_agent()
-        self.architecture_agent = create_architecture_decision_agent()
+        self.agent = create_sfc_programmer_agent() if _ADK_AVAILABLE else None
+        self.architecture_agent = create_architecture_decision_agent() if _ADK_AVAILABLE else None
         self.compile_tool = CompileAndSaveSFCTool()
         self.results: List[ModeResult] = []
+        self._action_names_text, self._project_context = self._build_project_context()
+        self._architecture_pending: Dict[str, "asyncio.Future[ModeArchitecture]"] = {}
+        # Compiled SFC code per structural file signature -> (code, mode_id, name, step_offset).
+        # Modes that only differ by id/name/position reuse it instead of a new generation.
+        self._sfc_cache: Dict[str, tuple] = {}
+        # Files of batched modes, keyed by (mode_id, sfc_name); each future resolves once its
+        # batch returns (None: not produced by a batch - generate it on its own)
+        self._batched_files: Dict[tuple, "asyncio.Future[Optional[SFCFileResult]]"] = {}
+        # Shared by every mode and file, so task fan-out within modes stays bounded too
+        self.max_parallel_agents = max_parallel_agents or self.MAX_PARALLEL_AGENTS
+        self._agent_slots = asyncio.Semaphore(self.max_parallel_agents)
+        # Prompt-cache effectiveness over all agent calls (reported in the run result)
+        self._total_prompt_tokens = 0
+        self._total_cached_tokens = 0
+
+    def _record_usage(self, *sources: Any) -> None:
+        """Add the token usage of the first source that carries any (response, then stream)."""
+        for source in sources:
+            prompt_tokens, cached_tokens = _usage_tokens(source)
+            if prompt_tokens:
+                self._total_prompt_tokens += prompt_tokens
+                self._total_cached_tokens += cached_tokens
+                return
+
+    def _build_project_context(self) -> tuple:
+        """Format the project-wide prompt sections once (they are the same for every mode)."""
+        action_names_text = "\n".join(
+            f"- {a['name']}" for a in self.io_context.actions
+        ) or "- None"
+
+        vars_text = "\n".join([
+            f"  - {v['name']} ({v['type']}): {v.get('description', '')}"
+            for v in self.io_context.variables
+        ])
+        actions_text = "\n".join([
+            f"  - {a['name']}: {a.get('description', '')} [Qualifier: {a.get('qualifier', 'N')}]"
+            for a in self.io_context.actions
+        ])
+        project_context = f"""### Available Variables (use in transition conditions)
+{vars_text if vars_text else '  - No variables defined'}
+
+### Available Actions (use in step actions)
+{actions_text if actions_text else '  - No actions defined'}
+
+### Project Path
+{self.project_path}
+"""
+        return action_names_text, project_context
 
     async def _decide_architecture(self, mode: ModeContext) -> ModeArchitecture:
         """
@@ -443,8 +718,66 @@ class SFCProgrammerLoop:
         """
         logger.info(f"[SFCProgrammerLoop] Analyzing architecture for mode: {mode.mode_id}")
 
+        # Clear-cut modes are classified by rule; only borderline ones cost an LLM call
+        heuristic = self._heuristic_architecture(mode)
+        if heuristic is not None:
+            logger.info(
+                f"[SFCProgrammerLoop] Heuristic architecture for mode {mode.mode_id}: "
+                f"{heuristic.architecture_type}"
+            )
+            return heuristic
+
+        signature = _architecture_signature(mode, [a["name"] for a in self.io_context.actions])
+        cached = _architecture_cache.get(signature)
+        if cached is not None:
+            _architecture_cache.move_to_end(signature)
+            logger.info(f"[SFCProgrammerLoop] Architecture cache hit for mode: {mode.mode_id}")
+            return replace(cached, mode_id=mode.mode_id, files=[replace(f) for f in cached.files])
+
+        # Identical modes processed concurrently share one in-flight request
+        pending = self._architecture_pending.get(signature)
+        if pending is None:
+            pending = asyncio.ensure_future(self._request_architecture(mode, signature))
+            self._architecture_pending[signature] = pending
+            pending.add_done_callback(lambda _task: self._architecture_pending.pop(signature, None))
+        else:
+            logger.info(f"[SFCProgrammerLoop] Joining in-flight architecture decision for mode: {mode.mode_id}")
+        architecture = await asyncio.shield(pending)
+        return replace(architecture, mode_id=mode.mode_id, files=[replace(f) for f in architecture.files])
+
+    def _heuristic_architecture(self, mode: ModeContext) -> Optional[ModeArchitecture]:
+        """Rule-based architecture for clearly simple/complex modes; None when borderline."""
+        complexity = (
+            len(mode.entry_conditions)
+            + len(mode.exit_conditions)
+            + len(mode.description.split()) // 20
+            + (1 if mode.category == "F" else 0)
+        )
+        if complexity < self.ARCH_SIMPLE_THRESHOLD and len(self.io_context.actions) < self.ARCH_SIMPLE_MAX_ACTIONS:
+            return self._single_architecture(mode, f"Simple mode (complexity {complexity}) - single SFC")
+        if complexity > self.ARCH_COMPLEX_THRESHOLD:
+            return ModeArchitecture(
+                mode_id=mode.mode_id,
+                architecture_type="hierarchical",
+                files=[
+                    SFCFileSpec(name="main", role="Orchestrates the mode phases", is_main=True),
+                    *(
+                        SFCFileSpec(name=name, role=role, is_main=False, called_by="main")
+                        for name, role in _HIERARCHICAL_TASK_SPLIT
+                    ),
+                ],
+                reasoning=f"Complex mode (complexity {complexity}) - templated task split"
+            )
+        return None
+
+    async def _request_architecture(self, mode: ModeContext, signature: str) -> ModeArchitecture:
+        """Ask the Architecture Decision Agent (cache miss path of _decide_architecture)."""
         # Format the mode details for architecture analysis
-        prompt = f"""Analyze this GSRSM mode and decide on its SFC architecture:
+        # Project-wide sections first: every mode's request then shares the same prefix
+        prompt = f"""## Available Actions (indicates complexity)
+{self._action_names_text}
+
+Analyze this GSRSM mode and decide on its SFC architecture:
 
 ## Mode Details
 - **Mode ID**: {mode.mode_id}
@@ -453,22 +786,24 @@ class SFCProgrammerLoop:
 - **Description**: {mode.description}
 
 ## Entry Conditions
-{chr(10).join(f'- {c}' for c in mode.entry_conditions) if mode.entry_conditions else '- None specified'}
+{_render_conditions(tuple(mode.entry_conditions))}
 
 ## Exit Conditions
-{chr(10).join(f'- {c}' for c in mode.exit_conditions) if mode.exit_conditions else '- None specified'}
-
-## Available Actions (indicates complexity)
-{chr(10).join(f'- {a["name"]}' for a in self.io_context.actions) if self.io_context.actions else '- None'}
+{_render_conditions(tuple(mode.exit_conditions))}
 
 Decide whether this mode needs a single SFC or hierarchical SFCs."""
 
+        if not _ADK_AVAILABLE:
+            logger.warning("[SFCProgrammerLoop] ADK not available, using default single architecture")
+            return self._single_architecture(mode, "Default single architecture (fallback)")
+
         try:
-            from google import adk
-            response = await adk.runtime.run_async(
-                self.architecture_agent,
-                prompt
-            )
+            async with self._agent_slots:
+                response = await adk.runtime.run_async(
+                    self.architecture_agent,
+                    prompt
+                )
+            self._record_usage(response)
 
             # Parse the structured output
             if isinstance(response, dict):
@@ -481,77 +816,36 @@ Decide whether this mode needs a single SFC or hierarchical SFCs."""
                     )
                     for f in response.get("files", [])
                 ]
-                return ModeArchitecture(
+                architecture = ModeArchitecture(
                     mode_id=mode.mode_id,
                     architecture_type=response.get("architecture_type", "single"),
                     files=files,
                     reasoning=response.get("reasoning", "")
                 )
-        except ImportError:
-            logger.warning("[SFCProgrammerLoop] ADK not available, using default single architecture")
+                # Only real decisions are cached - the fallback below is retried next time
+                _architecture_cache[signature] = architecture
+                if len(_architecture_cache) > ARCHITECTURE_CACHE_SIZE:
+                    _architecture_cache.popitem(last=False)
+                return architecture
         except Exception as e:
             logger.error(f"[SFCProgrammerLoop] Architecture decision error: {e}")
 
         # Default to single SFC architecture
+        return self._single_architecture(mode, "Default single architecture (fallback)")
+
+    @staticmethod
+    def _single_architecture(mode: ModeContext, reasoning: str) -> ModeArchitecture:
+        """One default.sfc holding all of the mode's logic."""
         return ModeArchitecture(
             mode_id=mode.mode_id,
             architecture_type="single",
             files=[SFCFileSpec(name="default", role="Main mode logic", is_main=True)],
-            reasoning="Default single architecture (fallback)"
+            reasoning=reasoning
         )
 
-    def _build_file_prompt(
-        self,
-        mode: ModeContext,
-        architecture: ModeArchitecture,
-        file_spec: SFCFileSpec,
-        previous_error: Optional[str] = None,
-        attempt: int = 1
-    ) -> str:
-        """Build the prompt for generating a specific SFC file."""
-
-        # Format variables for the prompt
-        vars_text = "\n".join([
-            f"  - {v['name']} ({v['type']}): {v.get('description', '')}"
-            for v in self.io_context.variables
-        ])
-
-        # Format actions for the prompt
-        actions_text = "\n".join([
-            f"  - {a['name']}: {a.get('description', '')} [Qualifier: {a.get('qualifier', 'N')}]"
-            for a in self.io_context.actions
-        ])
-
-        # Build file-specific context
-        if file_spec.is_main and architecture.architecture_type == "hierarchical":
-            task_files = [f for f in architecture.files if not f.is_main]
-            task_list = "\n".join([f"  - {f.name}: {f.role}" for f in task_files])
-            file_context = f"""
-### Architecture Type: HIERARCHICAL (Main Orchestrator)
-You are generating the **main.sfc** that orchestrates these task SFCs:
-{task_list}
-
-Use `Step N (Macro)` with `LinkedFile "{task_name}"` to call each task SFC.
-"""
-        elif not file_spec.is_main and architecture.architecture_type == "hierarchical":
-            file_context = f"""
-### Architecture Type: HIERARCHICAL (Task SFC)
-You are generating a task SFC: **{file_spec.name}.sfc**
-- Role: {file_spec.role}
-- Called by: {file_spec.called_by or 'main'}.sfc
-
-This is a self-contained sub-process. It should have its own Initial step
-and complete workflow for this specific task.
-"""
-        else:
-            file_context = """
-### Architecture Type: SINGLE
-Generate a single SFC file (default.sfc) that handles all mode logic.
-"""
-
-        prompt = f"""## TASK: Generate SFC File "{file_spec.name}" for Mode {mode.mode_id}
-
-### Mode Details
+    def _build_mode_section(self, mode: ModeContext) -> str:
+        """Mode details, step numbering and entry/exit conditions (shared by all files of a mode)."""
+        return f"""### Mode Details
 - **Mode ID**: {mode.mode_id}
 - **Name**: {mode.name}
 - **Category**: {mode.category}
@@ -574,50 +868,125 @@ Step {mode.step_offset + 2} "Second Operation"
 Jump {mode.step_offset}
 ```
 
-{file_context}
-
 ### Entry Conditions (transitions INTO this mode)
-{chr(10).join(f'- {c}' for c in mode.entry_conditions) if mode.entry_conditions else '- None specified'}
+{_render_conditions(tuple(mode.entry_conditions))}
 
 ### Exit Conditions (transitions OUT OF this mode)
-{chr(10).join(f'- {c}' for c in mode.exit_conditions) if mode.exit_conditions else '- None specified'}
-
-### Available Variables (use in transition conditions)
-{vars_text if vars_text else '  - No variables defined'}
+{_render_conditions(tuple(mode.exit_conditions))}
+"""
 
-### Available Actions (use in step actions)
-{actions_text if actions_text else '  - No actions defined'}
+    def _build_file_prompt(
+        self,
+        mode: ModeContext,
+        architecture: ModeArchitecture,
+        file_spec: SFCFileSpec
+    ) -> str:
+        """Build the prompt for generating a specific SFC file (first attempt)."""
+        hierarchical = architecture.architecture_type == "hierarchical"
+
+        # Written in one buffer, layered from most to least shared so consecutive requests
+        # reuse the longest prefix: project (all modes) -> mode (all its files) -> file
+        # (-> retry deltas)
+        buf = io.StringIO()
+        buf.write(self._project_context)
+        buf.write(f"\n## TASK: Generate SFC Files for Mode {mode.mode_id}\n\n")
+        buf.write(self._build_mode_section(mode))
+
+        # File-specific context
+        if file_spec.is_main and hierarchical:
+            buf.write(
+                "\n### Architecture Type: HIERARCHICAL (Main Orchestrator)\n"
+                "You are generating the **main.sfc** that orchestrates these task SFCs:\n"
+            )
+            for f in architecture.files:
+                if not f.is_main:
+                    buf.write(f"  - {f.name}: {f.role}\n")
+            buf.write('\nUse `Step N (Macro)` with `LinkedFile "{task_name}"` to call each task SFC.\n')
+        elif hierarchical:
+            buf.write(f"""
+### Architecture Type: HIERARCHICAL (Task SFC)
+You are generating a task SFC: **{file_spec.name}.sfc**
+- Role: {file_spec.role}
+- Called by: {file_spec.called_by or 'main'}.sfc
 
-### Project Path
-{self.project_path}
+This is a self-contained sub-process. It should have its own Initial step
+and complete workflow for this specific task.
+""")
+        else:
+            buf.write("""
+### Architecture Type: SINGLE
+Generate a single SFC file (default.sfc) that handles all mode logic.
+""")
 
+        buf.write(f"""
 ### SFC Name to Generate
 {file_spec.name}
-"""
-
-        # Add error context if retrying
-        if previous_error and attempt > 1:
-            prompt += f"""
-### ⚠️ PREVIOUS ATTEMPT FAILED (Attempt {attempt}/{self.MAX_RETRIES})
-**Error Message:**
-```
-{previous_error}
-```
-
-**Instructions:**
-1. Analyze the error message carefully
-2. Identify the syntax or logic issue
-3. Generate CORRECTED SFC DSL code
-4. Call the CompileAndSaveSFC tool with the fixed code
-"""
 
-        prompt += f"""
 ### ACTION REQUIRED
 Generate the SFC DSL code for "{file_spec.name}.sfc" and call the `CompileAndSaveSFC` tool.
 Use sfc_name="{file_spec.name}" in the tool call.
+""")
+        return buf.getvalue()
+
+    def _retry_message(self, attempt: int, previous_error: str) -> str:
+        """Short delta appended to the conversation after a failed attempt."""
+        return f"""
+### ⚠️ Attempt {attempt - 1}/{self.MAX_RETRIES} failed:
+```
+{previous_error}
+```
+Generate corrected SFC DSL code and call the CompileAndSaveSFC tool.
 """
 
-        return prompt
+    @staticmethod
+    def _sfc_signature(
+        mode: ModeContext,
+        architecture: ModeArchitecture,
+        file_spec: SFCFileSpec
+    ) -> str:
+        """Structural key of a file request: the prompt minus mode id, name and step offset."""
+        task_names = ",".join(f.name for f in architecture.files if not f.is_main)
+        parts = [
+            architecture.architecture_type,
+            file_spec.name,
+            file_spec.role,
+            str(file_spec.is_main),
+            task_names,
+            _architecture_signature(mode, []),  # IO is fixed for the loop
+        ]
+        return hashlib.blake2b("\0".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+    async def _reuse_cached_sfc(
+        self,
+        cached: tuple,
+        mode: ModeContext,
+        file_spec: SFCFileSpec
+    ) -> Optional[SFCFileResult]:
+        """Compile a previously generated file retargeted to this mode; None if it doesn't compile."""
+        sfc_code = _retarget_sfc_code(cached[0], cached[1:], mode)
+        try:
+            result = await self.compile_tool.compile_and_save_sfc(
+                sfc_code=sfc_code,
+                mode_id=mode.mode_id,
+                project_path=self.project_path,
+                sfc_name=file_spec.name
+            )
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        if not result.get("success"):
+            logger.info(
+                f"[SFCProgrammerLoop] {mode.mode_id}/{file_spec.name} - "
+                f"Cached SFC from {cached[1]} did not compile, generating: {result.get('error')}"
+            )
+            return None
+        logger.info(f"[SFCProgrammerLoop] {mode.mode_id}/{file_spec.name} - Reused SFC from {cached[1]}")
+        return SFCFileResult(
+            name=file_spec.name,
+            file_path=result.get("path"),
+            success=True,
+            attempts=0,  # no generation needed
+            sfc_code=sfc_code
+        )
 
     async def _process_single_file(
         self,
@@ -629,7 +998,30 @@ Use sfc_name="{file_spec.name}" in the tool call.
 
         logger.info(f"[SFCProgrammerLoop] Processing file: {mode.mode_id}/{file_spec.name}")
 
+        signature = self._sfc_signature(mode, architecture, file_spec)
+
+        # Generated together with other modes (see _batch_single_modes)
+        pending = self._batched_files.get((mode.mode_id, file_spec.name))
+        batched = await asyncio.shield(pending) if pending is not None else None
+        self._batched_files.pop((mode.mode_id, file_spec.name), None)
+        if batched is not None:
+            if batched.sfc_code:
+                self._sfc_cache.setdefault(
+                    signature, (batched.sfc_code, mode.mode_id, mode.name, mode.step_offset)
+                )
+            return batched
+
+        # A structurally identical file was generated for another mode - compile that first
+        cached = self._sfc_cache.get(signature)
+        if cached is not None:
+            reused = await self._reuse_cached_sfc(cached, mode, file_spec)
+            if reused is not None:
+                return reused
+
         previous_error = None
+        # Built once; each retry only appends a short error delta, so the whole
+        # previous request stays an unchanged prefix for the provider's cache
+        prompt = self._build_file_prompt(mode, architecture, file_spec)
 
         for attempt in range(1, self.MAX_RETRIES + 1):
             logger.info(
@@ -637,10 +1029,8 @@ Use sfc_name="{file_spec.name}" in the tool call.
                 f"Attempt {attempt}/{self.MAX_RETRIES}"
             )
 
-            # Build prompt with architecture context
-            prompt = self._build_file_prompt(
-                mode, architecture, file_spec, previous_error, attempt
-            )
+            if previous_error and attempt > 1:
+                prompt += self._retry_message(attempt, previous_error)
 
             try:
                 response = await self._call_agent(prompt, mode, file_spec.name)
@@ -650,6 +1040,10 @@ Use sfc_name="{file_spec.name}" in the tool call.
                         f"[SFCProgrammerLoop] {mode.mode_id}/{file_spec.name} - "
                         f"SUCCESS on attempt {attempt}"
                     )
+                    if response.get("sfc_code"):
+                        self._sfc_cache[signature] = (
+                            response["sfc_code"], mode.mode_id, mode.name, mode.step_offset
+                        )
                     return SFCFileResult(
                         name=file_spec.name,
                         file_path=response.get("path"),
@@ -683,33 +1077,57 @@ Use sfc_name="{file_spec.name}" in the tool call.
             attempts=self.MAX_RETRIES
         )
 
-    async def _process_single_mode(self, mode: ModeContext) -> ModeResult:
+    async def _process_single_mode(
+        self,
+        mode: ModeContext,
+        architecture: Optional[ModeArchitecture] = None
+    ) -> ModeResult:
         """Process a single mode with architecture decision and multi-file support."""
 
         logger.info(f"[SFCProgrammerLoop] Processing mode: {mode.mode_id}")
 
-        # Step 1: Decide architecture for this mode
-        architecture = await self._decide_architecture(mode)
+        # Step 1: Decide architecture for this mode (unless run() already did)
+        if architecture is None:
+            architecture = await self._decide_architecture(mode)
         logger.info(
             f"[SFCProgrammerLoop] Mode {mode.mode_id} architecture: "
             f"{architecture.architecture_type} ({len(architecture.files)} files)"
         )
 
         # Step 2: Generate each SFC file
-        # For hierarchical: generate task SFCs first, then main (so main can reference them)
-        files_to_process = sorted(
-            architecture.files,
-            key=lambda f: (f.is_main, f.name)  # Non-main files first
+        # Task SFCs don't depend on each other - generate them concurrently,
+        # then main (sequentially, so it can reference the tasks)
+        task_files: List[SFCFileSpec] = []
+        main_files: List[SFCFileSpec] = []
+        for f in architecture.files:
+            (main_files if f.is_main else task_files).append(f)
+
+        outcomes = await asyncio.gather(
+            *(self._process_single_file(mode, architecture, f) for f in task_files),
+            return_exceptions=True
         )
-
+        # A task that raised is reported as a failed file instead of aborting its siblings
         file_results: List[SFCFileResult] = []
-        for file_spec in files_to_process:
+        for file_spec, outcome in zip(task_files, outcomes):
+            if isinstance(outcome, BaseException):
+                if not isinstance(outcome, Exception):
+                    raise outcome  # cancellation etc. - don't swallow
+                logger.error(f"[SFCProgrammerLoop] {mode.mode_id}/{file_spec.name} failed: {outcome}")
+                outcome = SFCFileResult(name=file_spec.name, success=False, error=str(outcome))
+            file_results.append(outcome)
+
+        for file_spec in main_files:
             result = await self._process_single_file(mode, architecture, file_spec)
             file_results.append(result)
 
         # Step 3: Determine overall success
-        all_success = all(f.success for f in file_results)
-        any_error = next((f.error for f in file_results if f.error), None)
+        all_success = True
+        any_error = None
+        for f in file_results:
+            if not f.success:
+                all_success = False
+            if f.error and any_error is None:
+                any_error = f.error
 
         return ModeResult(
             mode_id=mode.mode_id,
@@ -719,6 +1137,145 @@ Use sfc_name="{file_spec.name}" in the tool call.
             error=any_error if not all_success else None
         )
 
+    def _build_batch_prompt(self, modes: List[ModeContext]) -> str:
+        """Build one prompt generating default.sfc for several single-architecture modes."""
+        sections = "\n".join(
+            f"## MODE {i}: {mode.mode_id}\n{self._build_mode_section(mode)}"
+            for i, mode in enumerate(modes, 1)
+        )
+        mode_ids = ", ".join(mode.mode_id for mode in modes)
+        return f"""{self._project_context}
+## TASK: Generate SFC Files for Modes {mode_ids}
+
+### Architecture Type: SINGLE
+Each mode below is independent. Generate a single SFC file (default.sfc) per mode
+that handles all of that mode's logic, using that mode's own step numbering.
+
+{sections}
+### ACTION REQUIRED
+For EACH mode above, generate its SFC DSL code and call the `CompileAndSaveSFC` tool once,
+with that mode's ID as mode_id and sfc_name="default".
+"""
+
+    async def _process_mode_batch(self, modes: List[ModeContext]) -> Dict[str, SFCFileResult]:
+        """
+        Generate default.sfc for several single-architecture modes in one agent call.
+
+        The shared prompt prefix (project context + instruction) is paid once for the
+        whole batch. Returns the files that compiled, keyed by mode_id; modes missing
+        from the result go through the regular per-file loop.
+        """
+        mode_ids = [mode.mode_id for mode in modes]
+        logger.info(f"[SFCProgrammerLoop] Batch generating modes: {', '.join(mode_ids)}")
+
+        tool_results = []
+
+        saved = set()
+        stream_usage = None
+        response = None
+
+        async def capture_callback(token: str, metadata: dict = None):
+            nonlocal stream_usage
+            meta = metadata or {}
+            if _usage_tokens(meta)[0]:
+                stream_usage = meta
+            if meta.get("type", "token") == "tool_result":
+                result = meta.get("result", {})
+                tool_results.append(result)
+                if result.get("success"):
+                    saved.add((result.get("sfc_file") or {}).get("mode_id"))
+                    if saved.issuperset(mode_ids):
+                        raise _EarlyStop  # every mode saved
+
+        if not _ADK_AVAILABLE:
+            return {}  # the per-file path has its own fallback
+
+        try:
+            async with self._agent_slots:
+                response = await adk.runtime.run_async(
+                    self.agent,
+                    self._build_batch_prompt(modes),
+                    context={"project_path": self.project_path, "mode_ids": mode_ids},
+                    stream_callback=capture_callback
+                )
+        except _EarlyStop:
+            pass
+        except Exception as e:
+            logger.error(f"[SFCProgrammerLoop] Batch agent execution error: {e}")
+        self._record_usage(response, stream_usage)
+
+        # Correlate results to modes by the mode_id the tool saved under
+        files: Dict[str, SFCFileResult] = {}
+        for result in tool_results:
+            sfc_file = result.get("sfc_file") or {}
+            mode_id = sfc_file.get("mode_id")
+            if result.get("success") and mode_id in mode_ids and mode_id not in files:
+                files[mode_id] = SFCFileResult(
+                    name="default",
+                    file_path=result.get("path"),
+                    success=True,
+                    attempts=1,
+                    sfc_code=sfc_file.get("sfc_code")
+                )
+        logger.info(f"[SFCProgrammerLoop] Batch produced {len(files)}/{len(modes)} modes")
+        return files
+
+    async def _batch_single_modes(
+        self,
+        modes: List[ModeContext],
+        decisions: Dict[str, "asyncio.Future[ModeArchitecture]"]
+    ) -> None:
+        """
+        Generate the single-file modes in batches once every architecture is decided.
+
+        Runs alongside the per-mode tasks. Each batched mode's self._batched_files future
+        resolves as soon as its own batch returns; every other mode's resolves to None
+        when batching is planned, so it never waits on batches it isn't part of.
+        """
+        def resolve(mode_id: str, file_result: Optional[SFCFileResult]) -> None:
+            pending = self._batched_files.get((mode_id, "default"))
+            if pending is not None and not pending.done():
+                pending.set_result(file_result)
+
+        async def run_batch(batch: List[ModeContext]) -> None:
+            files: Dict[str, SFCFileResult] = {}
+            try:
+                files = await self._process_mode_batch(batch)
+            finally:
+                for mode in batch:
+                    resolve(mode.mode_id, files.get(mode.mode_id))
+
+        try:
+            outcomes = await asyncio.gather(
+                *(decisions[mode.mode_id] for mode in modes),
+                return_exceptions=True
+            )
+            single_modes: List[ModeContext] = []
+            for mode, outcome in zip(modes, outcomes):
+                if isinstance(outcome, BaseException):
+                    if not isinstance(outcome, Exception):
+                        raise outcome  # cancellation etc. - don't swallow
+                    continue  # decided again (and reported) by _process_single_mode
+                if outcome.architecture_type == "single" and [f.name for f in outcome.files] == ["default"]:
+                    single_modes.append(mode)
+
+            batches = [
+                single_modes[i:i + self.MODE_BATCH_SIZE]
+                for i in range(0, len(single_modes), self.MODE_BATCH_SIZE)
+            ]
+            batches = [batch for batch in batches if len(batch) > 1]
+            batched_ids = {mode.mode_id for batch in batches for mode in batch}
+            for mode in modes:
+                if mode.mode_id not in batched_ids:
+                    resolve(mode.mode_id, None)
+            for outcome in await asyncio.gather(*(run_batch(batch) for batch in batches), return_exceptions=True):
+                if isinstance(outcome, Exception):
+                    logger.error(f"[SFCProgrammerLoop] Batch generation failed: {outcome}")
+        finally:
+            # Never leave a mode waiting on a batch that won't come
+            for mode in modes:
+                resolve(mode.mode_id, None)
+
     async def _call_agent(
         self,
         prompt: str,
@@ -731,9 +1288,11 @@ Use sfc_name="{file_spec.name}" in the tool call.
         Uses ADK runtime to execute the agent with the given prompt.
         The agent will generate SFC DSL code and call CompileAndSaveSFC tool.
         """
-        try:
-            from google import adk
+        if not _ADK_AVAILABLE:
+            logger.warning("[SFCProgrammerLoop] ADK not available, using direct tool call fallback")
+            return await self._fallback_direct_generation(prompt, mode, sfc_name)
 
+        try:
             logger.info(f"[SFCProgrammerLoop] Calling agent for {mode.mode_id}/{sfc_name}")
 
             # Build context with project path for tool calls
@@ -745,23 +1304,35 @@ Use sfc_name="{file_spec.name}" in the tool call.
 
             # Track tool call results
             tool_results = []
+            stream_usage = None
 
             # Callback to capture tool calls and their results
             async def capture_callback(token: str, metadata: dict = None):
+                nonlocal stream_usage
                 meta = metadata or {}
                 event_type = meta.get("type", "token")
+                if _usage_tokens(meta)[0]:
+                    stream_usage = meta  # kept in case the run is stopped early
 
                 if event_type == "tool_result":
-                    tool_results.append(meta.get("result", {}))
+                    result = meta.get("result", {})
+                    tool_results.append(result)
                     logger.info(f"[SFCProgrammerLoop] Tool result captured: {meta.get('tool_name')}")
+                    if result.get("success"):
+                        raise _EarlyStop  # file saved - skip the agent's closing commentary
 
             # Execute the agent
-            response = await adk.runtime.run_async(
-                self.agent,
-                prompt,
-                context=context,
-                stream_callback=capture_callback
-            )
+            async with self._agent_slots:
+                try:
+                    response = await adk.runtime.run_async(
+                        self.agent,
+                        prompt,
+                        context=context,
+                        stream_callback=capture_callback
+                    )
+                except _EarlyStop:
+                    response = None
+            self._record_usage(response, stream_usage)
 
             # Check if any tool call succeeded
             for result in tool_results:
@@ -769,7 +1340,7 @@ Use sfc_name="{file_spec.name}" in the tool call.
                     return {
                         "success": True,
                         "path": result.get("path"),
-                        "sfc_code": result.get("sfc_code")
+                        "sfc_code": result.get("sfc_code") or (result.get("sfc_file") or {}).get("sfc_code")
                     }
                 elif result.get("error"):
                     return {
@@ -787,9 +1358,6 @@ Use sfc_name="{file_spec.name}" in the tool call.
                 "error": "Agent did not call CompileAndSaveSFC tool. Response: " + str(response)[:200]
             }
 
-        except ImportError:
-            logger.warning("[SFCProgrammerLoop] ADK not available, using direct tool call fallback")
-            return await self._fallback_direct_generation(prompt, mode, sfc_name)
         except Exception as e:
             logger.error(f"[SFCProgrammerLoop] Agent execution error: {e}")
             return {"success": False, "error": str(e)}
@@ -809,68 +1377,15 @@ Use sfc_name="{file_spec.name}" in the tool call.
         # Generate a basic SFC template based on mode type and sfc_name
         if sfc_name == "main":
             # Main orchestrator template
-            sfc_code = f'''SFC "Mode {mode.mode_id} - Main Orchestrator"
-Step 0 (Initial)
-Transition T0 "MODE_{mode.mode_id}_ACTIVE AND NOT E_STOP"
-Step 1 (Macro)
-    LinkedFile "task_1"
-Transition T1 "TASK_1_COMPLETE"
-Step 2 (Macro)
-    LinkedFile "task_2"
-Transition T2 "TASK_2_COMPLETE"
-Step 0 (Initial)'''
+            sfc_code = _FALLBACK_MAIN_TEMPLATE.substitute(mode_id=mode.mode_id)
         elif "_task" in sfc_name:
             # Task SFC template
             task_name = sfc_name.replace("_task", "").upper()
-            sfc_code = f'''SFC "{task_name} Task"
-Step 0 (Initial)
-Transition T0 "TASK_START"
-Step 1
-    Action {task_name}_ACTION (N)
-Transition T1 "{task_name}_DONE"
-Step 0 (Initial)'''
+            sfc_code = _FALLBACK_TASK_TEMPLATE.substitute(task_name=task_name)
         else:
             # Standard single SFC templates
-            sfc_templates = {
-                "A1": '''SFC "Mode A1 - Initial State"
-Step 0 (Initial)
-Transition T0 "PB_START AND NOT E_STOP"
-Step 1
-Transition T1 "S_READY"
-Step 0 (Initial)''',
-                "F1": '''SFC "Mode F1 - Normal Production"
-Step 0 (Initial)
-Transition T0 "MODE_F1_ACTIVE AND NOT E_STOP"
-Step 1
-Transition T1 "S_PROCESS_COMPLETE"
-Step 2
-Transition T2 "S_CYCLE_DONE"
-Step 0 (Initial)''',
-                "D1": '''SFC "Mode D1 - Emergency Stop"
-Step 0 (Initial)
-Transition T0 "E_STOP"
-Step 1
-Transition T1 "PB_RESET AND NOT E_STOP"
-Step 0 (Initial)''',
-                "A5": '''SFC "Mode A5 - Restart Preparation"
-Step 0 (Initial)
-Transition T0 "PB_RESTART AND NOT E_STOP"
-Step 1
-Transition T1 "S_HOME_POS"
-Step 0 (Initial)''',
-                "A6": '''SFC "Mode A6 - Reset to Initial"
-Step 0 (Initial)
-Transition T0 "PB_RESET"
-Step 1
-Transition T1 "S_RESET_COMPLETE"
-Step 0 (Initial)'''
-            }
-            sfc_code = sfc_templates.get(mode.mode_id, f'''SFC "Mode {mode.mode_id} - {mode.name}"
-Step 0 (Initial)
-Transition T0 "START_CONDITION"
-Step 1
-Transition T1 "END_CONDITION"
-Step 0 (Initial)''')
+            template = _FALLBACK_SFC_TEMPLATES.get(mode.mode_id, _FALLBACK_DEFAULT_TEMPLATE)
+            sfc_code = template.substitute(mode_id=mode.mode_id, name=mode.name)
 
         # Try to compile and save
         try:
@@ -895,20 +1410,20 @@ Step 0 (Initial)''')
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    async def run(
+    async def run_iter(
         self,
         modes: List[ModeContext],
         parallel: Optional[bool] = None
-    ) -> SFCProgrammerResult:
+    ) -> AsyncIterator[ModeResult]:
         """
-        Main loop: Process all modes with optional parallel execution.
+        Process all modes, yielding each ModeResult as soon as that mode finishes.
+
+        In parallel mode results arrive in completion order, so consumers can start
+        on finished modes (validation, Conduct SFC, UI updates) while others run.
 
         Args:
             modes: List of ModeContext objects to process
             parallel: Whether to process modes in parallel (default: use class setting)
-
-        Returns:
-            SFCProgrammerResult with overall status and per-mode results
         """
         use_parallel = parallel if parallel is not None else self.PARALLEL_MODE_PROCESSING
 
@@ -917,40 +1432,85 @@ Step 0 (Initial)''')
             f"(parallel={use_parallel})"
         )
 
-        self.results = []
-
-        if use_parallel and len(modes) > 1:
-            # Process all modes in parallel
-            logger.info(f"[SFCProgrammerLoop] Processing {len(modes)} modes in parallel")
+        # Single-file modes are generated several per agent call. Architectures are decided
+        # concurrently and batches run as their own task, so every mode starts on its own
+        # decision and only batched files wait for their batch.
+        decisions: Dict[str, "asyncio.Future[ModeArchitecture]"] = {}
+        tasks: List["asyncio.Future"] = []
+        if self.BATCH_SINGLE_MODES and len(modes) > 1:
+            loop = asyncio.get_running_loop()
+            for mode in modes:
+                decisions[mode.mode_id] = asyncio.ensure_future(self._decide_architecture(mode))
+                self._batched_files[(mode.mode_id, "default")] = loop.create_future()
+            tasks.extend(decisions.values())
+            tasks.append(asyncio.ensure_future(self._batch_single_modes(modes, decisions)))
+
+        async def process_with_logging(mode: ModeContext) -> ModeResult:
+            architecture = None
+            decision = decisions.get(mode.mode_id)
+            if decision is not None:
+                try:
+                    architecture = await asyncio.shield(decision)
+                except Exception:
+                    pass  # decided again (and reported) by _process_single_mode
+            try:
+                result = await self._process_single_mode(mode, architecture)
+            except Exception as e:
+                # A mode that raised is reported as failed instead of aborting the others
+                logger.error(f"[SFCProgrammerLoop] Mode {mode.mode_id} failed: {e}")
+                return ModeResult(mode_id=mode.mode_id, success=False, error=str(e))
+            status = "✓" if result.success else "✗"
+            file_count = len(result.files) if result.files else 1
+            logger.info(
+                f"[SFCProgrammerLoop] [{status}] Mode {mode.mode_id} - "
+                f"{file_count} files, {result.attempts} attempts"
+            )
+            return result
 
-            async def process_with_logging(mode: ModeContext) -> ModeResult:
-                result = await self._process_single_mode(mode)
-                status = "✓" if result.success else "✗"
-                file_count = len(result.files) if result.files else 1
+        try:
+            if use_parallel and len(modes) > 1:
+                # Process all modes in parallel, at most max_parallel_agents agent calls at a time
                 logger.info(
-                    f"[SFCProgrammerLoop] [{status}] Mode {mode.mode_id} - "
-                    f"{file_count} files, {result.attempts} attempts"
+                    f"[SFCProgrammerLoop] Processing {len(modes)} modes in parallel "
+                    f"(max {self.max_parallel_agents} concurrent agent calls)"
                 )
-                return result
+                mode_tasks = [asyncio.ensure_future(process_with_logging(mode)) for mode in modes]
+                tasks.extend(mode_tasks)
+                for next_done in asyncio.as_completed(mode_tasks):
+                    yield await next_done
+            else:
+                # Process modes sequentially
+                for i, mode in enumerate(modes):
+                    logger.info(f"[SFCProgrammerLoop] Processing mode {i+1}/{len(modes)}: {mode.mode_id}")
+                    yield await process_with_logging(mode)
+        finally:
+            # Consumer stopped early (or we were cancelled) - don't leave modes or batches running
+            for task in tasks:
+                task.cancel()
+            self._batched_files.clear()
 
-            self.results = await asyncio.gather(
-                *[process_with_logging(mode) for mode in modes]
-            )
-        else:
-            # Process modes sequentially
-            for i, mode in enumerate(modes):
-                logger.info(f"[SFCProgrammerLoop] Processing mode {i+1}/{len(modes)}: {mode.mode_id}")
+    async def run(
+        self,
+        modes: List[ModeContext],
+        parallel: Optional[bool] = None
+    ) -> SFCProgrammerResult:
+        """
+        Main loop: Process all modes with optional parallel execution.
 
-                result = await self._process_single_mode(mode)
-                self.results.append(result)
+        Args:
+            modes: List of ModeContext objects to process
+            parallel: Whether to process modes in parallel (default: use class setting)
 
-                # Log progress
-                status = "✓" if result.success else "✗"
-                file_count = len(result.files) if result.files else 1
-                logger.info(
-                    f"[SFCProgrammerLoop] [{status}] Mode {mode.mode_id} - "
-                    f"{file_count} files, {result.attempts} attempts"
-                )
+        Returns:
+            SFCProgrammerResult with overall status and per-mode results
+        """
+        self.results = []
+        async for result in self.run_iter(modes, parallel):
+            self.results.append(result)
+
+        # Report in mode order, not completion order
+        order = {mode.mode_id: i for i, mode in enumerate(modes)}
+        self.results.sort(key=lambda r: order.get(r.mode_id, len(order)))
 
         # Build summary
         successful = sum(1 for r in self.results if r.success)
@@ -960,7 +1520,9 @@ Step 0 (Initial)''')
             total_modes=len(modes),
             successful=successful,
             failed=failed,
-            results=self.results
+            results=self.results,
+            prompt_tokens=self._total_prompt_tokens,
+            cached_tokens=self._total_cached_tokens
         )
 
         logger.info(f"[SFCProgrammerLoop] {final_result.summary()}")
@@ -992,23 +1554,25 @@ def extract_modes_from_gsrsm(gsrsm_data: Dict[str, Any]) -> List[ModeContext]:
     gsrsm_modes = gsrsm_data.get("modes", [])
     transitions = gsrsm_data.get("transitions", [])
 
+    # Only activated modes get a ModeContext - conditions of the others are never read
+    activated_ids = {m.get("id") or m.get("code") for m in gsrsm_modes if m.get("activated", False)}
+    activated_ids.discard(None)
+
     # Build transition lookup
-    entry_conditions: Dict[str, List[str]] = {}
-    exit_conditions: Dict[str, List[str]] = {}
+    entry_conditions: Dict[str, List[str]] = defaultdict(list)
+    exit_conditions: Dict[str, List[str]] = defaultdict(list)
 
     for t in transitions:
         from_mode = t.get("fromMode")
         to_mode = t.get("toMode")
+        if to_mode not in activated_ids and from_mode not in activated_ids:
+            continue
         condition = t.get("condition", "")
 
-        if to_mode:
-            if to_mode not in entry_conditions:
-                entry_conditions[to_mode] = []
+        if to_mode in activated_ids:
             entry_conditions[to_mode].append(condition)
 
-        if from_mode:
-            if from_mode not in exit_conditions:
-                exit_conditions[from_mode] = []
+        if from_mode in activated_ids:
             exit_conditions[from_mode].append(condition)
 
     # Build ModeContext for each activated mode with conduct_step
@@ -1178,7 +1742,7 @@ Generate the Conduct SFC now based on the provided GSRSM data.
 """
 
 
-def create_conduct_sfc_agent(project_path: str) -> adk.Agent:
+def create_conduct_sfc_agent(project_path: str) -> "adk.Agent":
     """
     Create the Conduct SFC Agent.
 
@@ -1197,7 +1761,7 @@ def create_conduct_sfc_agent(project_path: str) -> adk.Agent:
     return adk.Agent(
         name="ConductSFCProgrammer",
         model="gemini-2.5-flash-preview-05-20",
-        instruction=CONDUCT_SFC_INSTRUCTION,
+        instruction=StaticInstruction(CONDUCT_SFC_INSTRUCTION),
         tools=[compile_tool.compile_and_save_sfc]
     )
 
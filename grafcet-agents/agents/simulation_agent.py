@@ -7,6 +7,8 @@ import asyncio
 import logging
 import json
 import os
+import re
+from collections import OrderedDict, deque
 from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional, Set, Tuple
 from datetime import datetime
@@ -14,6 +16,17 @@ from enum import Enum
 
 logger = logging.getLogger(__name__)
 
+# Transition-condition lexer: identifiers only (operators/parentheses are skipped).
+# A single linear character class, so scanning is O(len(condition)) whatever the IO size.
+_CONDITION_IDENTIFIER = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+_CONDITION_KEYWORDS = frozenset({"AND", "OR", "NOT", "TRUE", "FALSE", "T", "X"})
+
+# Static analysis results shared by every SimulationAgentLoop (one is built per validation),
+# keyed by (sfc path, mtime_ns, size, mode_id, IO names): revalidating an unchanged file
+# skips re-analysis. Oldest entries are evicted first.
+_static_issue_cache: "OrderedDict[tuple, list]" = OrderedDict()
+STATIC_ISSUE_CACHE_SIZE = 128
+
 
 # ============================================================================
 # Enums and Data Classes
@@ -184,22 +197,25 @@ class SFCAnalyzer:
         issues: List[ValidationIssue] = []
         elements = sfc_json.get("elements", [])
 
-        # Build element maps
-        steps = [e for e in elements if e.get("type") == "step"]
-        transitions = [e for e in elements if e.get("type") == "transition"]
-        connections = [e for e in elements if e.get("type") == "connection"]
-
-        # Create connection graph
+        # Build element maps and the connection graph in one pass over elements
+        steps: List[Dict] = []
+        transitions: List[Dict] = []
         connections_from: Dict[str, List[str]] = {}  # source -> [targets]
         connections_to: Dict[str, List[str]] = {}    # target -> [sources]
 
-        for conn in connections:
-            src = conn.get("sourceId", "")
-            tgt = conn.get("targetId", "")
-            if src:
-                connections_from.setdefault(src, []).append(tgt)
-            if tgt:
-                connections_to.setdefault(tgt, []).append(src)
+        for e in elements:
+            element_type = e.get("type")
+            if element_type == "step":
+                steps.append(e)
+            elif element_type == "transition":
+                transitions.append(e)
+            elif element_type == "connection":
+                src = e.get("sourceId", "")
+                tgt = e.get("targetId", "")
+                if src:
+                    connections_from.setdefault(src, []).append(tgt)
+                if tgt:
+                    connections_to.setdefault(tgt, []).append(src)
 
         # 1. Check for initial step
         initial_steps = [s for s in steps if s.get("isInitial", False)]
@@ -212,7 +228,7 @@ class SFCAnalyzer:
             ))
 
         # 2. Check for unreachable steps (not reachable from initial)
-        reachable = self._find_reachable_steps(initial_steps, connections_from, steps, transitions)
+        reachable = self._find_reachable_steps(initial_steps, connections_from, steps)
         for step in steps:
             step_id = step.get("id", "")
             step_name = step.get("label", step_id)
@@ -256,19 +272,17 @@ class SFCAnalyzer:
         self,
         initial_steps: List[Dict],
         connections_from: Dict[str, List[str]],
-        steps: List[Dict],
-        transitions: List[Dict]
+        steps: List[Dict]
     ) -> Set[str]:
         """BFS to find all steps reachable from initial steps."""
         reachable: Set[str] = set()
         step_ids = {s.get("id") for s in steps}
-        transition_ids = {t.get("id") for t in transitions}
 
-        queue = [s.get("id") for s in initial_steps]
+        queue = deque(s.get("id") for s in initial_steps)
         visited: Set[str] = set()
 
         while queue:
-            current = queue.pop(0)
+            current = queue.popleft()
             if current in visited:
                 continue
             visited.add(current)
@@ -356,15 +370,9 @@ class SFCAnalyzer:
             if not condition:
                 continue
 
-            # Extract variable names from condition (simple parsing)
-            import re
-            tokens = re.findall(r'[A-Za-z_][A-Za-z0-9_]*', condition)
-
-            # Filter out keywords and operators
-            keywords = {"AND", "OR", "NOT", "TRUE", "FALSE", "true", "false", "T", "X"}
-
-            for token in tokens:
-                if token.upper() not in keywords and token not in self.available_variables:
+            # Extract variable names from condition (keywords and operators filtered out)
+            for token in _CONDITION_IDENTIFIER.findall(condition):
+                if token not in self.available_variables and token.upper() not in _CONDITION_KEYWORDS:
                     # Check if it's a timer reference (T.T0, etc.)
                     if not token.startswith("T") or len(token) < 2:
                         issues.append(ValidationIssue(
@@ -451,6 +459,11 @@ class SimulationAgentLoop:
         # Create analyzer
         self.analyzer = SFCAnalyzer(self.available_variables, self.available_actions)
 
+        # The analysis depends on the IO names too, so they are part of the cache key
+        self._io_key = (frozenset(self.available_variables), frozenset(self.available_actions))
+        # mode_id -> (path, mtime_ns, size) of the loaded .sfc file, recorded by _load_sfc_file
+        self._sfc_stamps: Dict[str, Tuple[str, int, int]] = {}
+
     def _extract_variable_names(self) -> List[str]:
         """Extract variable names from IO context."""
         variables = self.io_context.get("variables", [])
@@ -484,6 +497,8 @@ class SimulationAgentLoop:
         try:
             if os.path.exists(file_path):
                 with open(file_path, 'r', encoding='utf-8') as f:
+                    stat = os.fstat(f.fileno())
+                    self._sfc_stamps[mode_id] = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
                     return json.load(f)
             else:
                 logger.warning(f"[SimulationAgent] SFC file not found: {file_path}")
@@ -532,6 +547,22 @@ class SimulationAgentLoop:
             results=results
         )
 
+    def _static_issues(self, mode_id: str, sfc_json: Dict[str, Any]) -> List[ValidationIssue]:
+        """Static analysis of a mode's SFC; reused across validations while the file is unchanged."""
+        stamp = self._sfc_stamps.get(mode_id)
+        if stamp is None:
+            return self.analyzer.analyze(sfc_json, mode_id)
+        key = (*stamp, mode_id, self._io_key)
+        cached = _static_issue_cache.get(key)
+        if cached is not None:
+            _static_issue_cache.move_to_end(key)
+            return list(cached)
+        static_issues = self.analyzer.analyze(sfc_json, mode_id)
+        _static_issue_cache[key] = static_issues
+        if len(_static_issue_cache) > STATIC_ISSUE_CACHE_SIZE:
+            _static_issue_cache.popitem(last=False)
+        return list(static_issues)
+
     async def _test_single_mode(
         self,
         mode_id: str,
@@ -572,7 +603,7 @@ class SimulationAgentLoop:
             )
 
         # 2. Run static analysis
-        static_issues = self.analyzer.analyze(sfc_json, mode_id)
+        static_issues = self._static_issues(mode_id, sfc_json)
         issues.extend(static_issues)
 
         # 3. Run simulation scenarios
@@ -11,6 +11,16 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Standard GSRSM mode names, used when the caller doesn't pass mode_name
+_MODE_NAME_DEFAULTS = {
+    "A1": "Initial Stop",
+    "A5": "Restart Preparation",
+    "A6": "Reset/Initialization",
+    "D1": "Emergency Stop",
+    "F1": "Normal Production",
+    "": "Conduct",  # conduct.sfc at project root
+}
+
 
 class RunSimulationTool(BaseTool):
     """Launches a real simulation for a specific SFC file with step-by-step execution.
@@ -50,6 +60,7 @@ class RunSimulationTool(BaseTool):
             project_path: Path to the project folder (e.g. "my_project").
             mode_id: GSRSM mode folder name (e.g. "A1", "F1", "D1"). Empty for root files.
             mode_name: Human-readable mode name (e.g. "Initial Stop", "Normal Production").
+                Defaults to the standard GSRSM name for mode_id (or mode_id itself).
             file_name: Name of the SFC file to simulate (default: "default.sfc").
             steps: Number of simulation steps to run (default: 50). Ignored if scenarios provided.
             delay_ms: Delay between steps in ms (legacy, backend uses fixed delays).
@@ -68,10 +79,13 @@ class RunSimulationTool(BaseTool):
                 - initialActiveSteps (list): Steps active at simulation start
                 - totalScenarios (int): Number of scenarios run (if applicable)
         """
+        if not mode_name:
+            mode_name = _MODE_NAME_DEFAULTS.get(mode_id, mode_id)
+
         # Extract project name from project_path (last folder name)
         project_name = project_path.rstrip("/\\").split("/")[-1].split("\\")[-1] if project_path else "Unknown"
 
-        logger.info(f"[{self.name}] Starting simulation for project '{project_name}', mode '{mode_id}' ({mode_name or 'N/A'}), file '{file_name}'")
+        logger.info(f"[{self.name}] Starting simulation for project '{project_name}', mode '{mode_id}' ({mode_name}), file '{file_name}'")
         
         if scenarios:
             logger.info(f"[{self.name}] Running with {len(scenarios)} scenarios (Step 3)")
@@ -146,7 +160,7 @@ class RunSimulationTool(BaseTool):
                                 "project_name": project_name,
                                 "sfc_file": file_name,
                                 "mode_id": mode_id,
-                                "mode_name": mode_name or mode_id,
+                                "mode_name": mode_name,
                                 "issues": [],
                                 "steps_visited": data.get("initialActiveSteps", []),
                                 "execution_time_ms": 0
@@ -159,7 +173,7 @@ class RunSimulationTool(BaseTool):
                                 "success": True,
                                 "message": data.get("message", "Scenario simulation started"),
                                 "project_name": project_name,
-                                "mode_name": mode_name or mode_id,
+                                "mode_name": mode_name,
                                 "filePath": data.get("filePath"),
                                 "url": navigate_url,
                                 "initialActiveSteps": data.get("initialActiveSteps"),
@@ -175,7 +189,7 @@ class RunSimulationTool(BaseTool):
                                 "project_name": project_name,
                                 "sfc_file": file_name,
                                 "mode_id": mode_id,
-                                "mode_name": mode_name or mode_id,
+                                "mode_name": mode_name,
                                 "issues": [{"severity": "error", "issue_type": "simulation_error", "message": error_text}],
                                 "steps_visited": [],
                                 "execution_time_ms": 0
@@ -210,7 +224,7 @@ class RunSimulationTool(BaseTool):
                                 "project_name": project_name,
                                 "sfc_file": file_name,
                                 "mode_id": mode_id,
-                                "mode_name": mode_name or mode_id,
+                                "mode_name": mode_name,
                                 "issues": [],
                                 "steps_visited": data.get("initialActiveSteps", []),
                                 "execution_time_ms": 0
@@ -223,7 +237,7 @@ class RunSimulationTool(BaseTool):
                                 "success": True,
                                 "message": data.get("message", "Simulation launched"),
                                 "project_name": project_name,
-                                "mode_name": mode_name or mode_id,
+                                "mode_name": mode_name,
                                 "filePath": data.get("filePath"),
                                 "url": navigate_url,
                                 "initialActiveSteps": data.get("initialActiveSteps"),
@@ -239,7 +253,7 @@ class RunSimulationTool(BaseTool):
                                 "project_name": project_name,
                                 "sfc_file": file_name,
                                 "mode_id": mode_id,
-                                "mode_name": mode_name or mode_id,
+                                "mode_name": mode_name,
                                 "issues": [{"severity": "error", "issue_type": "simulation_error", "message": error_text}],
                                 "steps_visited": [],
                                 "execution_time_ms": 0
@@ -259,7 +273,7 @@ class RunSimulationTool(BaseTool):
                     "project_name": project_name,
                     "sfc_file": file_name,
                     "mode_id": mode_id,
-                    "mode_name": mode_name or mode_id,
+                    "mode_name": mode_name,
                     "issues": [{"severity": "error", "issue_type": "exception", "message": str(e)}],
                     "steps_visited": [],
                     "execution_time_ms": 0
@@ -275,9 +289,7 @@ class RunSimulationTool(BaseTool):
     def _append_validation_result(self, tool_context, validation_result: dict):
         """ADK 2026: Helper to append validation result to state."""
         if tool_context is not None:
-            if "validation_results" not in tool_context.state:
-                tool_context.state["validation_results"] = []
-            tool_context.state["validation_results"].append(validation_result)
+            self._append_to_state(tool_context, "validation_results", validation_result)
             logger.info(f"[{self.name}] Appended validation_result to tool_context.state['validation_results']")
 
 
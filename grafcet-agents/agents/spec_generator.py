@@ -6,6 +6,7 @@ Uses Gemini's native PDF understanding capabilities.
 import os
 import json
 import aiohttp
+from collections import OrderedDict
 from typing import Optional
 from dataclasses import dataclass
 
@@ -152,17 +153,22 @@ class SpecGenerator:
     
     This is independent of the ADK agent system.
     """
-    
+
+    # Number of successful results kept for re-uploads of the same document
+    RESULT_CACHE_SIZE = 32
+
     def __init__(self, api_url: str = "http://localhost:3001/api/simulation/save-spec"):
         self.api_url = api_url
         self.model = "gemini-3-pro-preview"  # Gemini 3 for PDF analysis
+        self._result_cache: "OrderedDict[str, SpecResult]" = OrderedDict()
     
     async def generate_spec_from_pdf(
         self,
         file_uri: str,
         mime_type: str = "application/pdf",
         project_path: Optional[str] = None,
-        stream_callback=None
+        stream_callback=None,
+        content_hash: Optional[str] = None
     ) -> SpecResult:
         """
         Generate spec.md content from an uploaded PDF with streaming support.
@@ -172,10 +178,22 @@ class SpecGenerator:
             mime_type: MIME type of the file
             project_path: Optional project path to save spec.md
             stream_callback: Optional async callback(text_chunk) for real-time streaming
+            content_hash: Optional hash of the file bytes; identical documents reuse
+                          the previous result instead of calling Gemini again
 
         Returns:
             SpecResult with generated Markdown content
         """
+        cached = self._result_cache.get(content_hash) if content_hash else None
+        if cached is not None:
+            self._result_cache.move_to_end(content_hash)
+            print(f"[SpecGenerator] ♻️ Reusing cached spec for {content_hash}")
+            if stream_callback:
+                await stream_callback(cached.spec_content)
+            if project_path:
+                await self._save_spec(project_path, cached.spec_content)
+            return cached
+
         # Get the client lazily
         client = _get_genai_client()
         if not client:
@@ -231,11 +249,16 @@ class SpecGenerator:
             if project_path:
                 await self._save_spec(project_path, spec_content)
 
-            return SpecResult(
+            result = SpecResult(
                 success=True,
                 spec_content=spec_content,
                 images_described=images_count
             )
+            if content_hash:
+                self._result_cache[content_hash] = result
+                if len(self._result_cache) > self.RESULT_CACHE_SIZE:
+                    self._result_cache.popitem(last=False)
+            return result
 
         except Exception as e:
             print(f"[SpecGenerator] ❌ Generation failed: {e}")
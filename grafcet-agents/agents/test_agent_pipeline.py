@@ -43,7 +43,7 @@ async def test_project_io_tool():
     print(f"\n[1/4] Testing ProjectIOTool...")
     from project_io_tool import ProjectIOTool
     
-    tool = ProjectIOTool()
+    tool = ProjectIOTool(await_backend=True)
     
     # Sample actions and variables
     actions = [
@@ -65,7 +65,7 @@ async def test_spec_analyst():
     else:
         log_info("No spec.md found, using sample data")
 
-    tool = ProjectIOTool()
+    tool = ProjectIOTool(await_backend=True)
 
     # Sample IO data (simulating what SpecAnalyst would extract)
     actions = [
@@ -0,0 +1,213 @@
+"""
+SFC DSL Helper Tests
+
+Tests the text-level SFC DSL helpers used by the agents without a backend:
+- _retarget_sfc_code (sfc_programmer): reuse of a generated SFC for another mode
+- precheck_sfc_code (compile_save_tool): must accept everything the backend DSL
+  parser accepts (cases from grafcet-backend/test/sfcCompiler.test.ts)
+
+Run with: python test_sfc_dsl.py
+"""
+
+import sys
+
+from compile_save_tool import precheck_sfc_code
+from sfc_programmer import ModeContext, _retarget_sfc_code
+
+# Terminal colors
+GREEN = "\033[92m"
+RED = "\033[91m"
+CYAN = "\033[96m"
+RESET = "\033[0m"
+BOLD = "\033[1m"
+
+
+def log_test(name: str, passed: bool, details: str = ""):
+    """Log test result."""
+    status = f"{GREEN}✅ PASS{RESET}" if passed else f"{RED}❌ FAIL{RESET}"
+    print(f"  {status} {name}")
+    if details:
+        print(f"         {CYAN}{details}{RESET}")
+
+
+def log_section(title: str):
+    """Log section header."""
+    print(f"\n{BOLD}{'='*60}{RESET}")
+    print(f"  {BOLD}{title}{RESET}")
+    print(f"{BOLD}{'='*60}{RESET}")
+
+
+def check(name: str, actual, expected) -> bool:
+    """Log one comparison; returns whether it matched."""
+    passed = actual == expected
+    log_test(name, passed, "" if passed else f"expected {expected!r}, got {actual!r}")
+    return passed
+
+
+# ============================================================================
+# TEST 1: Retargeting a cached SFC to another mode
+# ============================================================================
+A1_SFC = '''SFC "Mode A1 - Fill tank"
+Step 0 (Initial)
+Transition T0 "MODE_A1_ACTIVE AND PB_A1 AND NOT E_STOP"
+Step 1
+    Action LAMP_A1 (N)
+Transition T1 "X1 AND Fill tank done"
+Jump 0'''
+
+
+def _mode(mode_id: str, name: str, conduct_step: int) -> ModeContext:
+    return ModeContext(
+        mode_id=mode_id, name=name, description="", category="A",
+        entry_conditions=[], exit_conditions=[], conduct_step=conduct_step,
+    )
+
+
+def test_retarget_sfc_code():
+    """Only the title, the mode flag and declared step numbers change."""
+    log_section("Test 1: _retarget_sfc_code")
+
+    source = _mode("A1", "Fill tank", 1)
+    target = _mode("A5", "Drain", 5)
+    code = _retarget_sfc_code(A1_SFC, ("A1", "Fill tank", source.step_offset), target)
+    lines = code.splitlines()
+    delta = target.step_offset - source.step_offset
+
+    results = [
+        check("Title carries the new id and name", lines[0], 'SFC "Mode A5 - Drain"'),
+        check("Mode activity flag follows the id", "MODE_A5_ACTIVE" in code and "MODE_A1_ACTIVE" not in code, True),
+        check("IO variable containing the id is kept", "PB_A1 AND NOT E_STOP" in lines[2], True),
+        check("IO action containing the id is kept", lines[4].strip(), "Action LAMP_A1 (N)"),
+        check("Name outside the title is kept", "Fill tank done" in lines[5], True),
+        check("Declared steps are shifted", lines[1], f"Step {delta} (Initial)"),
+        check("Jumps follow their step", lines[-1], f"Jump {delta}"),
+    ]
+    assert all(results)
+
+
+# ============================================================================
+# TEST 2: Local precheck agrees with the backend DSL parser
+# ============================================================================
+# Valid for the backend parser (the sfcCompiler.test.ts programs plus parser details)
+VALID_SFC = {
+    "simple sequence": '''
+        SFC "Simple"
+        Step 1 "Start"
+        Transition T1 "Go"
+        Step 2 "End"
+        ''',
+    "divergence and convergence": '''
+        SFC "Div"
+        Step 1 "Init"
+        Divergence AND
+            Branch
+                Step 2 "B1"
+            EndBranch
+            Branch
+                Step 3 "B2"
+            EndBranch
+        EndDivergence
+        Converge AND
+        Step 4 "Final"
+        ''',
+    "action blocks": '''
+        SFC "Actions"
+        Step 1 "S1"
+            Action "A1"
+            Action "A2" (Type=Temporal)
+        ''',
+    "jump": '''
+        SFC "Jump"
+        Step 1 "S1"
+        Transition T1 "T1"
+        Jump 1
+        ''',
+    "Converge closes a Divergence": '''
+        SFC "Converge"
+        Step 0 (Initial)
+        Divergence AND
+            Branch
+                Step 1
+            Branch
+                Step 2
+        Converge AND
+        Transition T1 "DONE"
+        Jump 0
+        ''',
+    "numbered Branch": '''
+        SFC "Branches"
+        Step 0 (Initial)
+        Divergence OR
+            Branch 1
+                Transition T1 "A"
+                Step 1
+            EndBranch
+            Branch 2
+                Transition T2 "B"
+                Step 2
+            EndBranch
+        EndDivergence
+        ''',
+    "lowercase step": '''
+        SFC "Case"
+        step 0 (Initial)
+        Transition T0 "GO"
+        jump 0
+        ''',
+}
+
+# Rejected locally: the parser fails on them or silently drops elements
+INVALID_SFC = {
+    "unclosed Divergence": '''
+        SFC "Open"
+        Step 0 (Initial)
+        Divergence AND
+            Branch
+                Step 1
+        ''',
+    "Branch outside a Divergence": '''
+        SFC "Stray"
+        Step 0 (Initial)
+        Branch
+            Step 1
+        ''',
+    "Jump to an undefined step": '''
+        SFC "Jump"
+        Step 1
+        Transition T1 "T1"
+        Jump 7
+        ''',
+}
+
+
+def test_precheck_sfc_code():
+    """Everything the backend parser accepts passes; broken structure is caught."""
+    log_section("Test 2: precheck_sfc_code")
+
+    results = [check(f"Accepts {name}", precheck_sfc_code(code), None) for name, code in VALID_SFC.items()]
+    for name, code in INVALID_SFC.items():
+        error = precheck_sfc_code(code)
+        results.append(error is not None)
+        log_test(f"Rejects {name}", error is not None, error or "")
+    assert all(results)
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+def main():
+    """Run all SFC DSL helper tests."""
+    tests = [test_retarget_sfc_code, test_precheck_sfc_code]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError:
+            pass
+    print(f"\n  {BOLD}Results: {passed}/{len(tests)} tests passed{RESET}\n")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
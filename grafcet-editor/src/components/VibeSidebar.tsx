@@ -1408,9 +1408,10 @@ const VibeSidebar: React.FC<VibeSidebarProps> = ({ isOpen, onClose }) => {
               filePath: data.filePath,
               message: data.message,
             } as RealtimeSyncEvent);
-          } else if (data.type === 'agent_response') {
-            // ADK run complete - clear thinking indicators and force final save
-            console.log('[VibeSidebar] 📨 Agent response (ADK complete) - forcing final save');
+          } else if (data.type === 'agent_response' || data.type === 'agent_response_commit') {
+            // ADK run complete (agent_response) or agent handoff (agent_response_commit, no text -
+            // the streamed chunks are already in the store) - clear thinking indicators and force save
+            console.log(`[VibeSidebar] 📨 ${data.type} from ${data.agent} - forcing save`);
 
             // Clear thinking messages
             setStreamingMessages([]);
@@ -1693,6 +1694,28 @@ const VibeSidebar: React.FC<VibeSidebarProps> = ({ isOpen, onClose }) => {
     };
 
     if (attachedFile) {
+      // Preferred path: multipart upload, then send only the file reference over the socket
+      try {
+        const host = (window.location.hostname === 'localhost' || !window.location.hostname) ? '127.0.0.1' : window.location.hostname;
+        const formData = new FormData();
+        formData.append('file', attachedFile);
+        const response = await fetch(`http://${host}:8000/files/upload`, { method: 'POST', body: formData });
+        const result = await response.json();
+        if (result.success) {
+          payload.file = {
+            name: attachedFile.name,
+            type: attachedFile.type,
+            uri: result.uri
+          };
+        } else {
+          console.warn('[VibeSidebar] Multipart upload failed, falling back to base64:', result.message);
+        }
+      } catch (err) {
+        console.warn('[VibeSidebar] Multipart upload unavailable, falling back to base64:', err);
+      }
+    }
+
+    if (attachedFile && !payload.file) {
       try {
         const base64Data = await new Promise<string>((resolve, reject) => {
           const reader = new FileReader();